@@ -1,194 +1,650 @@
-import torch
+import time
+import asyncio
+import itertools
+import functools
 import numpy as np
-from datetime import datetime
-from typing import List, Dict, Tuple, Any, Optional
-from sentence_transformers import SentenceTransformer
-from transformers import pipeline, AutoTokenizer
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import List, Dict, Tuple, Any, Optional, Iterable, Callable, Awaitable, AsyncIterator
 from ai_tutor_bot.utils.config import Config
-from ai_tutor_bot.utils.text_processor import TextProcessor
+from ai_tutor_bot.utils.text_processor import TextProcessor, METADATA_EXTRACTOR_VERSION
 from ai_tutor_bot.db.vector_db import VectorDBManager
 from ai_tutor_bot.utils.adaptive_learning import AdaptiveLearningSystem
+from ai_tutor_bot.utils.executor import InferenceExecutor, ExecutorOverloaded
+from ai_tutor_bot.utils.batching import MicroBatcher
+from ai_tutor_bot.utils.model_registry import ModelRegistry, embedding_model_id
+from ai_tutor_bot.utils.embedding_cache import EmbeddingCache
+from ai_tutor_bot.utils.ingestion import StreamingIngestor
+from ai_tutor_bot.utils.semantic_cache import SemanticResponseCache
+from ai_tutor_bot.utils.context_selector import ContextSelector
+from ai_tutor_bot.utils.metrics import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
 class TutorAgent:
-    def __init__(self):
-        # Set device in Config
-        Config.DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"Device set to use {Config.DEVICE}")
-        
-        self.embed_model = self._load_embedding_model()
-        self.qa_pipeline = self._load_qa_model()
-        self.db_manager = VectorDBManager()
-        self.learning_system = AdaptiveLearningSystem()
-        self.tokenizer = AutoTokenizer.from_pretrained(Config.QA_MODEL)
-
-    def _load_embedding_model(self) -> SentenceTransformer:
-        return SentenceTransformer(Config.EMBEDDING_MODEL, device=Config.DEVICE)
-
-    def _load_qa_model(self) -> Any:
-        return pipeline(
-            'question-answering',
-            model=Config.QA_MODEL,
-            tokenizer=Config.QA_MODEL,
-            device=0 if Config.DEVICE == "cuda" else -1
+    def __init__(self, executor: Optional[InferenceExecutor] = None,
+                 db_manager: Optional[VectorDBManager] = None,
+                 learning_system: Optional[AdaptiveLearningSystem] = None,
+                 embedding_cache: Optional[EmbeddingCache] = None):
+        self.executor = executor or InferenceExecutor()
+        self.db_manager = db_manager or VectorDBManager(executor=self.executor)
+        self.learning_system = learning_system or AdaptiveLearningSystem()
+        self.embedding_cache = embedding_cache or (
+            EmbeddingCache(embedding_model_id()) if Config.EMBEDDING_CACHE_ENABLED else None)
+        self.response_cache = SemanticResponseCache() if Config.SEMANTIC_CACHE_ENABLED else None
+        self.context_selector = ContextSelector(
+            tokenizer_loader=lambda: getattr(self.qa_pipeline, "tokenizer", None)) if Config.CONTEXT_SELECTION else None
+
+        # Concurrent requests share batched encoder and QA forward passes
+        max_wait = Config.BATCH_MAX_WAIT_MS / 1000.0
+        self.embed_batcher = MicroBatcher(
+            self._encode_batch, self.executor, "embed", Config.EMBED_BATCH_MAX_SIZE, max_wait)
+        self.qa_batcher = MicroBatcher(
+            self._qa_batch, self.executor, "qa", Config.QA_BATCH_MAX_SIZE, max_wait)
+
+        # Called with the doc ids whose chunks ingestion re-wrote or removed
+        self.invalidation_listeners: List[Callable[[List[str]], None]] = []
+
+        self._warmup: Optional[asyncio.Future] = None
+        self._ready = False
+        if not Config.DEFER_MODEL_LOADING:
+            self.preload()
+
+    # Models are loaded on first use; warmup()/preload() load them ahead of the first query
+
+    @property
+    def embed_model(self) -> Any:
+        return ModelRegistry.get("embedding")
+
+    @property
+    def qa_pipeline(self) -> Any:
+        return ModelRegistry.get("qa")
+
+    @staticmethod
+    def _model_names() -> List[str]:
+        # Token-mode chunking needs the embedding model's tokenizer before the first ingestion
+        return ["embedding", "qa"] + (["chunk_tokenizer"] if Config.CHUNK_MODE == "tokens" else [])
+
+    def preload(self):
+        """Load the models and open the vector store on the calling thread"""
+        for name in self._model_names():
+            ModelRegistry.get(name)
+        self.db_manager.open()
+        self._ready = True
+        logger.info(f"Model load times: {ModelRegistry.startup_report()}")
+
+    async def warmup(self):
+        """Load models and open the vector store on executor threads; concurrent callers share one load"""
+        if self._ready:
+            return
+        if self._warmup is None:
+            self._warmup = asyncio.ensure_future(self._load())
+        task = self._warmup
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            # Let the next caller retry
+            if self._warmup is task:
+                self._warmup = None
+            raise
+
+    async def _load(self):
+        await asyncio.gather(
+            *[self.executor.run("warmup", ModelRegistry.get, name, timeout=0) for name in self._model_names()],
+            self.db_manager.async_open(),
         )
+        self._ready = True
+        logger.info(f"Model load times: {ModelRegistry.startup_report()}")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.embed_model.encode(texts, batch_size=len(texts), show_progress_bar=False, convert_to_numpy=True)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        # Query/answer embeddings stay in the memory tier only
+        if self.embedding_cache is None:
+            return self._encode(texts)
+        return self.embedding_cache.encode(texts, self._encode, persist=False)
+
+    def _encode_chunks(self, chunks: List[str]) -> np.ndarray:
+        if self.embedding_cache is None:
+            return self.embed_model.encode(chunks, show_progress_bar=False, convert_to_numpy=True)
+        return self.embedding_cache.encode(
+            chunks, lambda texts: self.embed_model.encode(texts, show_progress_bar=False, convert_to_numpy=True))
 
-    async def ingest_documents(self, documents: List[Dict[str, str]]):
-        vectors = []
+    async def _embed_text(self, text: str) -> np.ndarray:
+        if self.embedding_cache is not None:
+            cached = self.embedding_cache.get(text)
+            if cached is not None:
+                return cached
+        return await self.embed_batcher.submit(text)
+
+    def _qa_batch(self, inputs: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        results = self.qa_pipeline(inputs, batch_size=len(inputs), max_seq_len=Config.QA_MAX_SEQ_LEN)
+        # The pipeline unwraps single-item inputs
+        return [results] if isinstance(results, dict) else list(results)
+
+    async def _select_context(self, query: str, query_embed: np.ndarray, passages: List[str]) -> str:
+        return (await self._select_contexts([query], [query_embed], [passages]))[0]
+
+    async def _select_contexts(self, queries: List[str], query_embeds: List[np.ndarray],
+                               passages: List[List[str]],
+                               run: Optional[Callable[..., Awaitable]] = None) -> List[str]:
+        """Closest sentences per query; run replaces executor.run, e.g. to wait out overload"""
+        run = run or self.executor.run
+        full = ["\n".join(texts) for texts in passages]
+        split = [ContextSelector.split(texts) for texts in passages]
+        if self.context_selector is None or not any(split):
+            return full
+        try:
+            # Sentences are corpus text, so their embeddings go to the persistent cache tier;
+            # questions retrieving the same chunks share one encoding of each sentence
+            unique = list(dict.fromkeys(sentence for sentences in split for _, sentence in sentences))
+            embeddings = await run("embed", self._encode_chunks, unique)
+            rows = {sentence: row for row, sentence in enumerate(unique)}
+
+            def select_all() -> List[str]:
+                return [self.context_selector.select(
+                            query, query_embed, sentences, embeddings[[rows[s] for _, s in sentences]])
+                        if sentences else context
+                        for query, query_embed, sentences, context in zip(queries, query_embeds, split, full)]
+
+            return await run("select", select_all)
+        except ExecutorOverloaded:
+            raise
+        except Exception as e:
+            logger.error(f"Context selection failed, using full context: {e}")
+            metrics.inc("fallbacks_total", kind="full_context")
+            return full
+
+    async def select_changed_documents(
+            self, documents: List[Dict[str, str]]) -> Tuple[List[Tuple[Dict[str, str], str]], Dict[str, List[str]]]:
+        """Documents whose fingerprint differs from the stored one, plus their current chunk ids"""
+        doc_ids = [doc["id"] for doc in documents if doc.get("id")]
+        stored = await self.db_manager.async_get_fingerprints(doc_ids)
+        changed = []
         for doc in documents:
             text = doc.get('text', '')
-            if not text or not isinstance(text, str):
-                logger.warning(f"Skipping document {doc.get('id')} with invalid text")
+            fingerprint = TextProcessor.document_fingerprint(text if isinstance(text, str) else "",
+                                                             *TutorAgent.chunk_settings())
+            if stored.get(doc.get("id")) == fingerprint:
                 continue
-                
-            chunks = TextProcessor.chunk_text(text, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
-            
-            # Filter out invalid chunks
-            chunks = [chunk for chunk in chunks if isinstance(chunk, str) and chunk.strip()]
+            changed.append((doc, fingerprint))
+
+        skipped = len(documents) - len(changed)
+        if skipped:
+            logger.info(f"Skipping {skipped} unchanged documents")
+
+        # Existing chunk ids of changed documents, to find ones the new version no longer has
+        previous = {}
+        if changed:
+            previous = await self.db_manager.async_get_chunk_ids(
+                [doc["id"] for doc, _ in changed if doc.get("id") in stored])
+        return changed, previous
+
+    @staticmethod
+    def chunk_settings() -> Tuple:
+        # Stored vectors are only comparable with queries embedded by the same weights, so a
+        # different model or ONNX quantization re-embeds every document
+        if Config.CHUNK_MODE == "tokens":
+            return ("tokens", embedding_model_id(), Config.CHUNK_MAX_TOKENS, Config.CHUNK_OVERLAP_TOKENS,
+                    METADATA_EXTRACTOR_VERSION)
+        return (Config.CHUNK_SIZE, Config.CHUNK_OVERLAP, embedding_model_id(), METADATA_EXTRACTOR_VERSION)
+
+    @staticmethod
+    def chunk_document(doc: Dict[str, str], fingerprint: str) -> List[Tuple[str, str, Dict]]:
+        """Split one document into (vector_id, chunk, metadata) records"""
+        text = doc.get('text', '')
+        if not text or not isinstance(text, str):
+            logger.warning(f"Skipping document {doc.get('id')} with invalid text")
+            return []
             
-            if not chunks:
-                logger.warning(f"No valid chunks found for document {doc.get('id')}")
-                continue
-                
-            # Encode chunks with error handling
+        if Config.CHUNK_MODE == "tokens":
+            chunks = TextProcessor.chunk_text_by_tokens(
+                text, ModelRegistry.get("chunk_tokenizer"), Config.CHUNK_MAX_TOKENS, Config.CHUNK_OVERLAP_TOKENS)
+        else:
+            chunks = TextProcessor.chunk_text(text, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+        
+        # Filter out invalid chunks
+        chunks = [chunk for chunk in chunks if isinstance(chunk, str) and chunk.strip()]
+        
+        if not chunks:
+            logger.warning(f"No valid chunks found for document {doc.get('id')}")
+            return []
+
+        records = []
+        extracted = TextProcessor.extract_metadata_batch(chunks)
+        for idx, (chunk, chunk_metadata) in enumerate(zip(chunks, extracted)):
             try:
-                embeddings = self.embed_model.encode(chunks, show_progress_bar=False, convert_to_numpy=True)
+                metadata = {
+                    "source": doc.get("source", ""),
+                    "doc_id": doc.get("id", ""),
+                    "chunk_id": str(idx),
+                    "doc_hash": fingerprint,
+                    **chunk_metadata
+                }
+                records.append((f"{doc['id']}_{idx}", chunk, metadata))
             except Exception as e:
-                logger.error(f"Embedding failed: {e}")
-                continue
-                
-            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                try:
-                    metadata = {
-                        "source": doc.get("source", ""),
-                        "doc_id": doc.get("id", ""),
-                        "chunk_id": str(idx),
-                        "text": chunk,
-                        **TextProcessor.extract_metadata(chunk)
-                    }
-                    vector_id = f"{doc['id']}_{idx}"
-                    vectors.append((vector_id, embedding.tolist(), metadata))
-                except Exception as e:
-                    logger.error(f"Error processing chunk: {e}")
-        
-        if vectors:
-            await self.db_manager.async_upsert(vectors)
-            logger.info(f"Ingested {len(vectors)} vectors from {len(documents)} documents")
-        else:
-            logger.warning("No vectors to ingest")
+                logger.error(f"Error processing chunk: {e}")
+        return records
+
+    def invalidate_documents(self, doc_ids: Optional[Iterable[str]]):
+        """Called by ingestion when documents are re-written or removed; None when new documents
+        were added, which can change the answer to any cached question"""
+        doc_ids = None if doc_ids is None else list(doc_ids)
+        if self.response_cache is not None:
+            if doc_ids is None:
+                self.response_cache.clear()
+            else:
+                self.response_cache.invalidate_documents(doc_ids)
+        for listener in self.invalidation_listeners:
+            listener(doc_ids)
+
+    async def ingest_documents(self, documents: Iterable[Dict[str, str]]) -> Dict[str, float]:
+        # Documents of any size stream through the bounded ingestion pipeline
+        return await StreamingIngestor(self).run(documents)
+
+    @staticmethod
+    def _empty_response(answer: str) -> Dict[str, Any]:
+        return {
+            "answer": answer,
+            "context": "",
+            "concepts": [],
+            "relevance_score": 0,
+            "sources": []
+        }
+
+    async def _cached_response(self, user_id: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        prioritized_concepts = await self._learning_context(user_id, response["context_concepts"])
+        return {
+            "answer": response["answer"],
+            "context": response["context"],
+            "concepts": prioritized_concepts,
+            "relevance_score": response["relevance_score"],
+            "sources": list(response["sources"]),
+            "cache_hit": True
+        }
+
+    # The progress store is a SQLite database, or an IPC round trip to the store writer in
+    # server workers, so these calls run on the executor instead of the event loop
+
+    async def _learning_context(self, user_id: str, concepts: List[str]) -> List[str]:
+        return await self.executor.run("progress", self.learning_system.get_learning_context, user_id, concepts)
+
+    async def _user_concepts(self, user_id: str) -> List[str]:
+        return await self.executor.run("progress", self.learning_system.get_user_concepts,
+                                       user_id, Config.CONCEPT_FILTER_MAX_CONCEPTS)
+
+    async def _record_reviews(self, reviews: Iterable[Tuple[str, str]]):
+        reviews = list(reviews)
+        if reviews:
+            await self.executor.run("progress", self.learning_system.update_progress_batch, reviews)
+
+    @staticmethod
+    def _context_concepts(results: List[Dict]) -> List[str]:
+        context_concepts = set()
+        for res in results:
+            concepts = res["metadata"].get('concepts', '')
+            if concepts:
+                context_concepts.update(concepts.split(", "))
+        return list(context_concepts)
+
+    @staticmethod
+    def _relevance(query_embed: Any, answer_embed: Any) -> float:
+        query_vector = np.asarray(query_embed, dtype=np.float32).ravel()
+        answer_vector = np.asarray(answer_embed, dtype=np.float32).ravel()
+        norms = np.linalg.norm(query_vector) * np.linalg.norm(answer_vector)
+        return float(query_vector @ answer_vector / norms) if norms else 0.0
+
+    def _cache_answer(self, query_embed: Any, response: Dict[str, Any], context_concepts: List[str],
+                      results: List[Dict], user_id: str, user_concepts: List[str]):
+        if self.response_cache is not None:
+            self.response_cache.store(query_embed, {
+                "answer": response["answer"],
+                "context": response["context"],
+                "context_concepts": context_concepts,
+                "relevance_score": response["relevance_score"],
+                "sources": response["sources"]
+            }, {res["metadata"].get("doc_id", "") for res in results},
+                SemanticResponseCache.scopes_for(user_id, user_concepts))
 
     async def generate_response(self, user_id: str, query: str) -> Dict[str, Any]:
         if not query or not isinstance(query, str) or not query.strip():
-            return {
-                "answer": "Please provide a valid question",
-                "context": "",
-                "concepts": [],
-                "relevance_score": 0,
-                "sources": []
-            }
+            return self._empty_response("Please provide a valid question")
             
         try:
-            query_embed = self.embed_model.encode([query])[0].tolist()
+            with metrics.span("embed_query"):
+                query_embed = await self._embed_text(query)
+        except ExecutorOverloaded:
+            raise
         except Exception as e:
             logger.error(f"Query embedding failed: {e}")
-            return {
-                "answer": "I couldn't process your question",
-                "context": "",
-                "concepts": [],
-                "relevance_score": 0,
-                "sources": []
-            }
-        
-        # Get user's concepts for filtering
-        user_concepts = self.learning_system.user_progress.get(user_id, {}).keys()
-        
-        # Create concept filter if any concepts exist
-        filter = None
-        if user_concepts:
-            # Build OR filter to match any of the user's concepts
-            filter = {"$or": [{"concepts": {"$contains": concept}} for concept in user_concepts]}
+            metrics.inc("errors_total", stage="embed_query")
+            return self._empty_response("I couldn't process your question")
+
+        # Get user's most recent concepts for filtering, bounded so latency stays flat
+        with metrics.span("user_concepts"):
+            user_concepts = await self._user_concepts(user_id)
+
+        # Near-duplicates of the user's own earlier questions, or of questions asked under the
+        # same concept filter, reuse the earlier answer and skip retrieval and QA
+        if self.response_cache is not None:
+            with metrics.span("cache_lookup"):
+                cached = self.response_cache.lookup(
+                    query_embed, SemanticResponseCache.scopes_for(user_id, user_concepts))
+            metrics.inc("cache_hits_total" if cached is not None else "cache_misses_total", cache="response")
+            if cached is not None:
+                response = await self._cached_response(user_id, cached["response"])
+                await self._record_reviews((user_id, concept) for concept in response["concepts"][:2])
+                return response
         
-        # Retrieve relevant chunks
+        # Retrieve relevant chunks, restricted to chunks indexed under those concepts
         try:
-            results = await self.db_manager.async_query(query_embed, filter)
-            
-            # Fallback to unfiltered search if no results
-            if not results:
-                logger.info("No results with concept filter, trying unfiltered search")
-                results = await self.db_manager.async_query(query_embed, None)
+            with metrics.span("retrieve"):
+                results = await self.db_manager.async_query(query_embed, concepts=user_concepts, query_text=query)
         except Exception as e:
             logger.error(f"Vector query failed: {e}")
+            metrics.inc("errors_total", stage="retrieve")
             results = []
         
         # If still no results, return empty response
         if not results:
-            return {
-                "answer": "I couldn't find relevant information to answer your question",
-                "context": "",
-                "concepts": [],
-                "relevance_score": 0,
-                "sources": []
-            }
+            return self._empty_response("I couldn't find relevant information to answer your question")
         
         # Extract concepts from results
-        context_concepts = set()
-        for res in results:
-            concepts = res["metadata"].get('concepts', '')
-            if concepts:
-                context_concepts.update(concepts.split(", "))
+        context_concepts = self._context_concepts(results)
         
         # Prioritize concepts based on learning progress
-        prioritized_concepts = self.learning_system.get_learning_context(
-            user_id, list(context_concepts))
+        prioritized_concepts = await self._learning_context(user_id, context_concepts)
         
-        # Build context from retrieved chunks
-        context = "\n".join([res["metadata"]['text'] for res in results])
+        # Build context from the retrieved sentences closest to the query
+        with metrics.span("select_context"):
+            context = await self._select_context(query, query_embed, [res["text"] for res in results])
         
         # Generate answer using Q&A pipeline
+        answered = False
         try:
-            answer = self.qa_pipeline(question=query, context=context)['answer']
+            with metrics.span("qa"):
+                answer = (await self.qa_batcher.submit({"question": query, "context": context}))['answer']
+            answered = True
+        except ExecutorOverloaded:
+            raise
         except Exception as e:
             logger.error(f"QA pipeline failed: {e}")
+            metrics.inc("errors_total", stage="qa")
             answer = "I couldn't generate an answer for that question. Please try again."
         
         # Update learning system with top concepts
-        for concept in prioritized_concepts[:2]:
-            self.learning_system.update_progress(user_id, concept)
+        with metrics.span("progress"):
+            await self._record_reviews((user_id, concept) for concept in prioritized_concepts[:2])
         
         # Calculate relevance score
         try:
-            answer_embed = self.embed_model.encode([answer])[0].reshape(1, -1)
-            query_embed_2d = np.array(query_embed).reshape(1, -1)
-            relevance_score = cosine_similarity(query_embed_2d, answer_embed)[0][0]
+            with metrics.span("relevance"):
+                relevance_score = self._relevance(query_embed, await self._embed_text(answer))
         except Exception as e:
             logger.error(f"Relevance score calculation failed: {e}")
+            metrics.inc("errors_total", stage="relevance")
             relevance_score = 0.0
-        
-        return {
+
+        response = {
             "answer": answer,
             "context": context,
             "concepts": prioritized_concepts,
             "relevance_score": relevance_score,
-            "sources": list(set(res["metadata"]['source'] for res in results))
+            "sources": list(set(res["metadata"]['source'] for res in results)),
+            "cache_hit": False
         }
+        if answered:
+            self._cache_answer(query_embed, response, context_concepts, results, user_id, user_concepts)
+        return response
 
-    async def handle_query(self, user_id: str, query: str) -> Dict[str, Any]:
-        start_time = datetime.now()
+    async def handle_query(self, user_id: str, query: str, trace: Optional[bool] = None) -> Dict[str, Any]:
+        """Answer one query; with trace (default Config.TRACE_REQUESTS) the response lists per-stage timings"""
+        trace = Config.TRACE_REQUESTS if trace is None else trace
+        trace_token = metrics.start_trace() if trace else None
+        start_time = time.perf_counter()
         try:
-            response = await self.generate_response(user_id, query)
+            with metrics.span("request"):
+                await self.warmup()
+                response = await self.generate_response(user_id, query)
+        except ExecutorOverloaded as e:
+            logger.warning(f"Rejecting query, tutor is overloaded: {e}")
+            metrics.inc("rejected_total")
+            response = self._empty_response("The tutor is busy right now. Please try again in a moment.")
         except Exception as e:
             logger.error(f"Error handling query: {e}")
-            response = {
-                "answer": "I encountered an error processing your request",
-                "context": "",
-                "concepts": [],
-                "relevance_score": 0,
-                "sources": []
-            }
+            metrics.inc("errors_total", stage="request")
+            response = self._empty_response("I encountered an error processing your request")
             
-        response['latency'] = (datetime.now() - start_time).total_seconds()
+        response['latency'] = time.perf_counter() - start_time
         response['user_id'] = user_id
-        return response
\ No newline at end of file
+        response.setdefault('cache_hit', False)
+        if trace_token is not None:
+            response['trace'] = metrics.end_trace(trace_token)
+        return response
+
+    async def answer_batch(self, pairs: Iterable[Tuple[str, str]],
+                           batch_size: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Answer many (user_id, query) pairs, yielding each response as soon as it is ready.
+
+        Every batch_size questions are embedded in one call and retrieved with one
+        backend query per distinct concept filter; QA runs in pipeline batches of
+        QA_BATCH_MAX_SIZE and progress updates are written in bulk. Responses can
+        arrive out of order and carry "index", the pair's position in the input.
+        """
+        batch_size = batch_size or Config.ANSWER_BATCH_SIZE
+        await self.warmup()
+        start = time.perf_counter()
+        answered = 0
+        pairs = iter(pairs)
+        while True:
+            batch = list(itertools.islice(pairs, batch_size))
+            if not batch:
+                break
+            async for response in self._answer_batch(batch, answered):
+                yield response
+            answered += len(batch)
+
+        elapsed = time.perf_counter() - start
+        metrics.inc("batch_questions_total", answered)
+        logger.info(f"Answered {answered} questions in {elapsed:.2f}s "
+                    f"({answered / elapsed if elapsed else 0.0:.1f} questions/s)")
+
+    async def _answer_batch(self, batch: List[Tuple[str, str]], offset: int) -> AsyncIterator[Dict[str, Any]]:
+        start_time = time.perf_counter()
+
+        def finish(i: int, response: Dict[str, Any]) -> Dict[str, Any]:
+            response["index"] = offset + i
+            response["user_id"] = batch[i][0]
+            response["latency"] = time.perf_counter() - start_time
+            response.setdefault("cache_hit", False)
+            return response
+
+        valid = [i for i, (_, query) in enumerate(batch) if isinstance(query, str) and query.strip()]
+        for i in sorted(set(range(len(batch))) - set(valid)):
+            yield finish(i, self._empty_response("Please provide a valid question"))
+        if not valid:
+            return
+
+        try:
+            with metrics.span("batch_embed"):
+                embeddings = await self._patiently(
+                    self.executor.run, "embed", self._encode_batch, [batch[i][1] for i in valid])
+        except ExecutorOverloaded:
+            raise
+        except Exception as e:
+            logger.error(f"Batch query embedding failed: {e}")
+            metrics.inc("errors_total", stage="batch_embed")
+            for i in valid:
+                yield finish(i, self._empty_response("I couldn't process your question"))
+            return
+
+        # Multi-call steps wait out overload per executor call rather than repeating earlier calls
+        patient = functools.partial(self._patiently, self.executor.run)
+        user_ids = list({batch[i][0] for i in valid})
+        user_concepts = dict(zip(user_ids, await patient(
+            "progress",
+            lambda: [self.learning_system.get_user_concepts(user_id, Config.CONCEPT_FILTER_MAX_CONCEPTS)
+                     for user_id in user_ids])))
+
+        # Near-duplicates of the user's own earlier questions, or of questions asked under the
+        # same concept filter, are answered from the cache
+        hits = []
+        pending = []
+        for i, query_embed in zip(valid, embeddings):
+            user_id = batch[i][0]
+            cached = (self.response_cache.lookup(
+                query_embed, SemanticResponseCache.scopes_for(user_id, user_concepts[user_id]))
+                if self.response_cache is not None else None)
+            if self.response_cache is not None:
+                metrics.inc("cache_hits_total" if cached is not None else "cache_misses_total", cache="response")
+            if cached is None:
+                pending.append((i, query_embed))
+            else:
+                hits.append((i, await self._patiently(self._cached_response, batch[i][0], cached["response"])))
+        await self._patiently(self._record_reviews,
+                              [(batch[i][0], concept) for i, response in hits for concept in response["concepts"][:2]])
+        for i, response in hits:
+            yield finish(i, response)
+        if not pending:
+            return
+
+        with metrics.span("batch_retrieve"):
+            try:
+                results = await self.db_manager.async_query_batch(
+                    [query_embed for _, query_embed in pending],
+                    concepts=[user_concepts[batch[i][0]] for i, _ in pending],
+                    query_texts=[batch[i][1] for i, _ in pending],
+                    run=patient)
+            except ExecutorOverloaded:
+                raise
+            except Exception as e:
+                logger.error(f"Batch vector query failed: {e}")
+                metrics.inc("errors_total", stage="batch_retrieve")
+                results = [[] for _ in pending]
+
+        found = []
+        for (i, query_embed), matches in zip(pending, results):
+            if not matches:
+                yield finish(i, self._empty_response("I couldn't find relevant information to answer your question"))
+            else:
+                found.append((i, query_embed, matches))
+        if not found:
+            return
+
+        with metrics.span("batch_select_context"):
+            contexts = await self._select_contexts(
+                [batch[i][1] for i, _, _ in found], [query_embed for _, query_embed, _ in found],
+                [[res["text"] for res in matches] for _, _, matches in found],
+                run=patient)
+
+        groups = [list(zip(found[start:start + Config.QA_BATCH_MAX_SIZE], contexts[start:start + Config.QA_BATCH_MAX_SIZE]))
+                  for start in range(0, len(found), Config.QA_BATCH_MAX_SIZE)]
+        # Each group makes one executor call at a time, so running no more groups than the
+        # executor admits keeps a bulk run from filling its queue and rejecting live queries
+        slots = asyncio.Semaphore(max(1, self.executor.max_in_flight))
+
+        async def answer_group(group):
+            async with slots:
+                return await self._answer_group(batch, group, user_concepts)
+
+        tasks = [asyncio.ensure_future(answer_group(group)) for group in groups]
+        try:
+            for task in asyncio.as_completed(tasks):
+                for i, response in await task:
+                    yield finish(i, response)
+        finally:
+            # A failed group or an abandoned generator must not leave the others running
+            for task in tasks:
+                task.cancel()
+
+    async def _patiently(self, fn: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs), waiting out executor overload instead of failing the bulk run"""
+        for attempt in range(Config.ANSWER_BATCH_OVERLOAD_RETRIES):
+            try:
+                return await fn(*args, **kwargs)
+            except ExecutorOverloaded:
+                metrics.inc("batch_overload_waits_total")
+                await asyncio.sleep(Config.ANSWER_BATCH_OVERLOAD_WAIT * 2 ** attempt)
+        return await fn(*args, **kwargs)
+
+    async def _answer_group(self, batch: List[Tuple[str, str]],
+                            group: List[Tuple[Tuple[int, Any, List[Dict]], str]],
+                            user_concepts: Dict[str, List[str]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """QA, relevance and progress for up to one QA batch of retrieved questions
+
+        Each executor call waits out overload on its own, so a full queue late in the
+        group does not repeat the QA call before it.
+        """
+        answered = False
+        try:
+            with metrics.span("batch_qa"):
+                outputs = await self._patiently(
+                    self.executor.run, "qa", self._qa_batch,
+                    [{"question": batch[i][1], "context": context} for (i, _, _), context in group])
+            answers = [output['answer'] for output in outputs]
+            answered = True
+        except ExecutorOverloaded:
+            raise
+        except Exception as e:
+            logger.error(f"Batch QA failed: {e}")
+            metrics.inc("errors_total", stage="batch_qa")
+            answers = ["I couldn't generate an answer for that question. Please try again."] * len(group)
+
+        try:
+            answer_embeds = await self._patiently(self.executor.run, "embed", self._encode_batch, answers)
+            relevance = [self._relevance(query_embed, answer_embed)
+                         for ((_, query_embed, _), _), answer_embed in zip(group, answer_embeds)]
+        except ExecutorOverloaded:
+            raise
+        except Exception as e:
+            logger.error(f"Batch relevance calculation failed: {e}")
+            metrics.inc("errors_total", stage="batch_relevance")
+            relevance = [0.0] * len(group)
+
+        context_concepts = [self._context_concepts(matches) for (_, _, matches), _ in group]
+        prioritized = await self._patiently(
+            self.executor.run, "progress",
+            lambda: [self.learning_system.get_learning_context(batch[i][0], concepts)
+                     for ((i, _, _), _), concepts in zip(group, context_concepts)])
+        responses = []
+        reviews = []
+        for ((i, query_embed, matches), context), answer, relevance_score, concepts, prioritized_concepts in zip(
+                group, answers, relevance, context_concepts, prioritized):
+            user_id = batch[i][0]
+            reviews.extend((user_id, concept) for concept in prioritized_concepts[:2])
+            response = {
+                "answer": answer,
+                "context": context,
+                "concepts": prioritized_concepts,
+                "relevance_score": relevance_score,
+                "sources": list(set(res["metadata"]['source'] for res in matches)),
+                "cache_hit": False
+            }
+            if answered:
+                self._cache_answer(query_embed, response, concepts, matches, user_id, user_concepts[user_id])
+            responses.append((i, response))
+
+        with metrics.span("batch_progress"):
+            await self._patiently(self._record_reviews, reviews)
+        return responses
+
+    def executor_stats(self) -> Dict[str, Any]:
+        """Per-stage call counts, queue wait and run time of the inference executor"""
+        stats = self.executor.stats()
+        stats["batching"] = {
+            "embed_mean_batch": self.embed_batcher.mean_batch_size,
+            "qa_mean_batch": self.qa_batcher.mean_batch_size,
+        }
+        if self.embedding_cache is not None:
+            stats["embedding_cache"] = self.embedding_cache.stats()
+        if self.response_cache is not None:
+            stats["response_cache"] = self.response_cache.stats()
+        return stats
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """Stage timings and counters as JSON-friendly data"""
+        return metrics.snapshot()
+
+    def metrics_text(self) -> str:
+        """Stage timings and counters in the Prometheus text exposition format"""
+        return metrics.prometheus()
\ No newline at end of file
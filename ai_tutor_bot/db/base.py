@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
+
+
+class VectorBackend(ABC):
+    """Storage/search engine behind VectorDBManager. Methods are blocking and run on the executor."""
+
+    # Backends that index the "concepts" metadata field themselves accept concepts= in query()
+    filters_concepts = False
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings: Sequence[Sequence[float]], metadatas: List[Dict]):
+        ...
+
+    @abstractmethod
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int,
+              where: Optional[Dict] = None, ids: Optional[List[str]] = None,
+              concepts: Optional[FrozenSet[str]] = None) -> List[List[Dict[str, Any]]]:
+        """Top matches per query as {"id", "score" (cosine similarity), "metadata"} dicts.
+
+        When ids is given, only those vectors are candidates. concepts, a set of
+        normalized concept keys, keeps only chunks mentioning any of them; it is
+        only passed to backends that set filters_concepts.
+        """
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> Dict[str, List]:
+        """Stored rows as {"ids": [...], "metadatas": [...]}"""
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    def max_batch_size(self) -> int:
+        return 1 << 31
+
+    def flush(self):
+        """Persist buffered writes, for backends that buffer them"""
@@ -0,0 +1,231 @@
+import os
+import re
+import math
+import pickle
+import threading
+import logging
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Words plus operator-joined formulas such as "f=ma" or "v=u+at"; "pH" and "Schrödinger" stay whole
+_TOKEN = re.compile(r'[^\W_]+(?:\s*[=+\-*/^]\s*[^\W_]+)*')
+_SPACES = re.compile(r'\s+')
+_PARTS = re.compile(r'[^\W_]+')
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = _SPACES.sub("", match.group(0))
+        tokens.append(token)
+        if not token.isalnum():
+            # Formulas also index their symbols so "ma" still matches "F = ma"
+            tokens.extend(_PARTS.findall(token))
+    return tokens
+
+
+class BM25Index:
+    """Incremental BM25 index with array-backed postings.
+
+    Each term keeps parallel row/term-frequency arrays; a query gathers them
+    as NumPy views and scores with vectorized arithmetic. Re-indexed or
+    deleted chunks are tombstoned and compacted once enough accumulate.
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 k1: Optional[float] = None,
+                 b: Optional[float] = None):
+        self.path = Config.BM25_INDEX_PATH if path is None else path
+        self.k1 = Config.BM25_K1 if k1 is None else k1
+        self.b = Config.BM25_B if b is None else b
+        self._lock = threading.RLock()
+        self._reset()
+        self._dirty = False
+        self.loaded = self._load()
+
+    def _reset(self):
+        self._terms: Dict[str, int] = {}
+        self._rows: List[array] = []  # term id -> chunk rows
+        self._tfs: List[array] = []  # term id -> term frequency per row
+        self._df = array('i')  # live documents per term
+        self._ids: List[Optional[str]] = []  # row -> chunk id
+        self._doc_terms: List[array] = []  # row -> term ids, to update df on removal
+        self._row_of: Dict[str, int] = {}
+        self._lengths = array('f')
+        self._alive = bytearray()
+        self._total_length = 0.0
+        self._norms: Optional[np.ndarray] = None
+
+    def _load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+            for key, value in state.items():
+                setattr(self, key, value)
+            return True
+        except Exception as e:
+            logger.error(f"Could not load BM25 index from {self.path}: {e}")
+            self._reset()
+            return False
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            self._compact()
+            state = {
+                "_terms": self._terms, "_rows": self._rows, "_tfs": self._tfs, "_df": self._df,
+                "_ids": self._ids, "_doc_terms": self._doc_terms, "_row_of": self._row_of, "_lengths": self._lengths,
+                "_alive": self._alive, "_total_length": self._total_length,
+            }
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._dirty = True
+
+    def _remove(self, chunk_id: str):
+        row = self._row_of.pop(chunk_id, None)
+        if row is None:
+            return
+        self._alive[row] = 0
+        self._total_length -= self._lengths[row]
+        self._norms = None
+        for term_id in self._doc_terms[row]:
+            self._df[term_id] -= 1
+
+    def add(self, chunks: Iterable[Tuple[str, str]]):
+        """Index (chunk_id, text) pairs, replacing earlier versions of the same chunk"""
+        with self._lock:
+            for chunk_id, text in chunks:
+                self._remove(chunk_id)
+                tokens = tokenize(text or "")
+                row = len(self._ids)
+                self._ids.append(chunk_id)
+                self._row_of[chunk_id] = row
+                self._lengths.append(len(tokens))
+                self._alive.append(1)
+                self._total_length += len(tokens)
+                self._norms = None
+
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                term_ids = array('i')
+                for token, tf in counts.items():
+                    term_id = self._terms.get(token)
+                    if term_id is None:
+                        term_id = len(self._terms)
+                        self._terms[token] = term_id
+                        self._rows.append(array('i'))
+                        self._tfs.append(array('f'))
+                        self._df.append(0)
+                    self._rows[term_id].append(row)
+                    self._tfs[term_id].append(tf)
+                    self._df[term_id] += 1
+                    term_ids.append(term_id)
+                self._doc_terms.append(term_ids)
+            self._dirty = True
+            self._maybe_compact()
+
+    def remove(self, chunk_ids: Iterable[str]):
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._remove(chunk_id)
+            self._dirty = True
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        dead = len(self._ids) - len(self._row_of)
+        if dead > max(1024, len(self._ids) // 4):
+            self._compact()
+
+    def _compact(self):
+        if len(self._ids) == len(self._row_of):
+            return
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        new_row = np.cumsum(alive) - 1
+        for term_id in range(len(self._rows)):
+            rows = np.frombuffer(self._rows[term_id], dtype=np.int32)
+            keep = alive[rows] if len(rows) else np.zeros(0, dtype=bool)
+            self._rows[term_id] = array('i', new_row[rows[keep]].astype(np.int32).tobytes())
+            self._tfs[term_id] = array('f', np.frombuffer(self._tfs[term_id], dtype=np.float32)[keep].tobytes())
+        self._ids = [chunk_id for chunk_id, live in zip(self._ids, alive) if live]
+        self._doc_terms = [terms for terms, live in zip(self._doc_terms, alive) if live]
+        self._lengths = array('f', np.frombuffer(self._lengths, dtype=np.float32)[alive].tobytes())
+        self._alive = bytearray(b"\x01" * len(self._ids))
+        self._row_of = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._norms = None
+
+    def search(self, query: str, k: int, allowed_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        tokens = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._row_of)
+            if not tokens or n_docs == 0:
+                return []
+            terms = [term_id for term_id in map(self._terms.get, tokens)
+                     if term_id is not None and self._df[term_id] > 0]
+            if not terms:
+                return []
+            # Terms in a large share of chunks carry little idf but touch most rows; skip them
+            # unless nothing rarer is left
+            common = n_docs * Config.BM25_MAX_DF_RATIO
+            terms = [term_id for term_id in terms if self._df[term_id] <= common] or \
+                [min(terms, key=lambda term_id: self._df[term_id])]
+
+            norms = self._row_norms()
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term_id in terms:
+                df = self._df[term_id]
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                rows = np.frombuffer(self._rows[term_id], dtype=np.int32)
+                tfs = np.frombuffer(self._tfs[term_id], dtype=np.float32)
+                # Rows are unique within a posting, so fancy-index accumulation is safe
+                scores[rows] += idf * tfs * (self.k1 + 1.0) / (tfs + norms[rows])
+
+            # Only rows holding a kept term are ranked
+            hits = np.flatnonzero(scores)
+            hits = hits[np.frombuffer(self._alive, dtype=np.uint8)[hits].astype(bool)]
+            if allowed_ids is not None:
+                mask = np.zeros(len(self._ids), dtype=bool)
+                mask[[self._row_of[i] for i in allowed_ids if i in self._row_of]] = True
+                hits = hits[mask[hits]]
+
+            k = min(k, len(hits))
+            if k == 0:
+                return []
+            top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[row], float(scores[row])) for row in top]
+
+    def _row_norms(self) -> np.ndarray:
+        """Per-row k1 * (1 - b + b * length / avg_length), kept until the next write"""
+        if self._norms is None:
+            avg_length = self._total_length / len(self._row_of) if self._row_of else 1.0
+            lengths = np.frombuffer(self._lengths, dtype=np.float32)
+            self._norms = (self.k1 * (1.0 - self.b + self.b * lengths / avg_length)).astype(np.float32)
+        return self._norms
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists by summing 1 / (k + rank)"""
+    k = Config.RRF_K if k is None else k
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda x: -x[1])
@@ -0,0 +1,69 @@
+import chromadb
+import numpy as np
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+from chromadb import Documents, EmbeddingFunction, Embeddings
+from ai_tutor_bot.db.base import VectorBackend
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class SharedEmbeddingFunction(EmbeddingFunction):
+    """Chroma embedding function backed by the registry's model instead of a second copy"""
+
+    def __call__(self, input: Documents) -> Embeddings:
+        model = ModelRegistry.get("embedding")
+        return list(model.encode(list(input), show_progress_bar=False, convert_to_numpy=True).astype(np.float32))
+
+
+class ChromaBackend(VectorBackend):
+    def __init__(self, path: Optional[str] = None, collection_name: Optional[str] = None):
+        # Initialize ChromaDB client
+        self.client = chromadb.PersistentClient(path=path or Config.CHROMA_PATH)
+        
+        # Create or get collection
+        self.embedding_function = SharedEmbeddingFunction()
+        
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name or Config.INDEX_NAME,
+            embedding_function=self.embedding_function,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    def upsert(self, ids: List[str], embeddings: Sequence[Sequence[float]], metadatas: List[Dict]):
+        self.collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas)
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int,
+              where: Optional[Dict] = None, ids: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            ids=ids,
+            n_results=n_results,
+            where=where,
+            include=["metadatas", "distances"]
+        )
+        
+        # Format results
+        matches = []
+        for ids, distances, metadatas in zip(results["ids"], results["distances"], results["metadatas"]):
+            matches.append([{
+                "id": vector_id,
+                "score": 1 - distance,  # Convert distance to similarity
+                "metadata": metadata
+            } for vector_id, distance, metadata in zip(ids, distances, metadatas)])
+        return matches
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> Dict[str, List]:
+        rows = self.collection.get(ids=ids, where=where, include=["metadatas"])
+        return {"ids": rows["ids"], "metadatas": rows["metadatas"]}
+
+    def delete(self, ids: List[str]):
+        self.collection.delete(ids=ids)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def max_batch_size(self) -> int:
+        return self.client.get_max_batch_size()
@@ -0,0 +1,144 @@
+import os
+import re
+import json
+import threading
+import logging
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_concept(concept: str) -> str:
+    return _WHITESPACE.sub(" ", concept).strip(" \t.,;:!?\"'()[]{}").lower()
+
+
+def split_concepts(value: Optional[str]) -> List[str]:
+    """Concepts as stored in chunk metadata: a ", "-joined string"""
+    if not value:
+        return []
+    return [c for c in value.split(", ") if c]
+
+
+class ConceptIndex:
+    """Inverted index from normalized concept id to the chunk ids that mention it.
+
+    Concepts are interned to integer ids at ingest time, so filtered retrieval
+    is a union of a few posting sets instead of substring matches over every
+    chunk's metadata.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Config.CONCEPT_INDEX_PATH if path is None else path
+        self._lock = threading.RLock()
+        self._concept_ids: Dict[str, int] = {}
+        self._postings: Dict[int, Set[str]] = {}
+        self._chunk_concepts: Dict[str, Tuple[int, ...]] = {}
+        self._dirty = False
+        self.loaded = self._load()
+
+    def _load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._concept_ids = data["concepts"]
+            for chunk_id, concept_ids in data["chunks"].items():
+                self._chunk_concepts[chunk_id] = tuple(concept_ids)
+                for concept_id in concept_ids:
+                    self._postings.setdefault(concept_id, set()).add(chunk_id)
+            return True
+        except Exception as e:
+            logger.error(f"Could not load concept index from {self.path}: {e}")
+            self._concept_ids, self._postings, self._chunk_concepts = {}, {}, {}
+            return False
+
+    def concept_id(self, concept: str, create: bool = False) -> Optional[int]:
+        key = normalize_concept(concept)
+        if not key:
+            return None
+        concept_id = self._concept_ids.get(key)
+        if concept_id is None and create:
+            concept_id = len(self._concept_ids)
+            self._concept_ids[key] = concept_id
+        return concept_id
+
+    def add(self, chunks: Iterable[Tuple[str, Iterable[str]]]):
+        """Index (chunk_id, concepts) pairs, replacing any previous entry for the chunk"""
+        with self._lock:
+            for chunk_id, concepts in chunks:
+                self._remove(chunk_id)
+                ids = tuple(sorted({cid for cid in (self.concept_id(c, create=True) for c in concepts)
+                                    if cid is not None}))
+                # Chunks without concepts are kept too, so len() matches the vector store
+                self._chunk_concepts[chunk_id] = ids
+                for concept_id in ids:
+                    self._postings.setdefault(concept_id, set()).add(chunk_id)
+            self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._chunk_concepts)
+
+    def clear(self):
+        with self._lock:
+            self._concept_ids, self._postings, self._chunk_concepts = {}, {}, {}
+            self._dirty = True
+
+    def _remove(self, chunk_id: str):
+        for concept_id in self._chunk_concepts.pop(chunk_id, ()):
+            posting = self._postings.get(concept_id)
+            if posting is not None:
+                posting.discard(chunk_id)
+                if not posting:
+                    del self._postings[concept_id]
+
+    def remove(self, chunk_ids: Iterable[str]):
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._remove(chunk_id)
+            self._dirty = True
+
+    def known(self, concepts: Iterable[str]) -> FrozenSet[str]:
+        """Normalized keys of those concepts that at least one chunk mentions"""
+        with self._lock:
+            return frozenset(key for key in map(normalize_concept, concepts)
+                             if key and self._postings.get(self._concept_ids.get(key)))
+
+    def candidate_bound(self, concepts: Iterable[str]) -> int:
+        """Upper bound on len(chunks_for(concepts)) without building the union"""
+        with self._lock:
+            return sum(len(self._postings.get(self.concept_id(concept), ())) for concept in concepts)
+
+    def mentioning(self, chunk_ids: Iterable[str], concepts: Iterable[str]) -> Set[str]:
+        """Those of chunk_ids that mention any of the concepts"""
+        with self._lock:
+            wanted = {self.concept_id(concept) for concept in concepts} - {None}
+            return {chunk_id for chunk_id in chunk_ids
+                    if not wanted.isdisjoint(self._chunk_concepts.get(chunk_id, ()))}
+
+    def chunks_for(self, concepts: Iterable[str]) -> Set[str]:
+        """Chunk ids that mention any of the concepts"""
+        candidates: Set[str] = set()
+        with self._lock:
+            for concept in concepts:
+                concept_id = self.concept_id(concept)
+                if concept_id is not None:
+                    candidates |= self._postings.get(concept_id, set())
+        return candidates
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            data = {
+                "concepts": self._concept_ids,
+                "chunks": {chunk_id: list(ids) for chunk_id, ids in self._chunk_concepts.items()},
+            }
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
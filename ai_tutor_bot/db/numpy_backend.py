@@ -0,0 +1,367 @@
+import os
+import json
+import time
+import atexit
+import threading
+import logging
+from array import array
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from ai_tutor_bot.db.base import VectorBackend
+from ai_tutor_bot.db.concept_index import normalize_concept, split_concepts
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Rows scored, and upcast copies cached, per block when the matrix is stored as float16
+_SCORE_BLOCK = 8192
+
+
+class NumpyBackend(VectorBackend):
+    """Exact in-process index: one contiguous, L2-normalized matrix searched with a matmul.
+
+    The matrix is memory-mapped from disk when opened and copied into RAM on
+    the first write. Deleted and replaced rows are tombstoned and compacted
+    lazily, so a row is never written twice and searches score a snapshot
+    outside the lock. Metadata filters are evaluated to boolean row masks that
+    are cached until the next write, so repeated filters cost one vectorized AND.
+    Concept filters use per-concept row arrays kept up to date on upsert, so a
+    candidate mask is a few fancy-index writes, however many chunks it covers.
+    """
+
+    filters_concepts = True
+
+    def __init__(self, path: Optional[str] = None, dtype: Optional[str] = None):
+        self.path = path or Config.NUMPY_INDEX_PATH
+        self.dtype = np.dtype(dtype or Config.NUMPY_INDEX_DTYPE)
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._ids: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict]] = []
+        self._row_of: Dict[str, int] = {}
+        self._masks: Dict[Tuple, np.ndarray] = {}
+        self._value_rows: Dict[str, Dict[Any, List[int]]] = {}
+        # Normalized concept -> rows mentioning it (dead rows included), built on first use
+        self._concept_rows: Optional[Dict[str, array]] = None
+        self._concept_arrays: Dict[str, np.ndarray] = {}
+        # Block index -> float32 copy of that full block of a float16 matrix, until compaction
+        self._upcast: Dict[int, np.ndarray] = {}
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._load()
+        atexit.register(self.flush)
+
+    # Persistence
+
+    def _files(self) -> Tuple[str, str]:
+        return os.path.join(self.path, "vectors.npy"), os.path.join(self.path, "metadata.json")
+
+    def _load(self):
+        vectors_path, meta_path = self._files()
+        if not (os.path.exists(vectors_path) and os.path.exists(meta_path)):
+            return
+        try:
+            matrix = np.load(vectors_path, mmap_mode="r")
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if matrix.shape[0] != len(meta["ids"]):
+                raise ValueError(f"{matrix.shape[0]} vectors but {len(meta['ids'])} ids")
+        except Exception as e:
+            logger.error(f"Could not load vector index from {self.path}, starting empty: {e}")
+            return
+
+        self._matrix = matrix
+        self.dtype = matrix.dtype
+        self._size = matrix.shape[0]
+        self._alive = np.ones(self._size, dtype=bool)
+        self._ids = list(meta["ids"])
+        self._metadatas = list(meta["metadatas"])
+        self._row_of = {vector_id: row for row, vector_id in enumerate(self._ids)}
+        logger.info(f"Opened vector index with {self._size} vectors from {self.path}")
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._compact()
+            os.makedirs(self.path, exist_ok=True)
+            vectors_path, meta_path = self._files()
+            matrix = self._matrix[:self._size] if self._matrix is not None else np.zeros((0, 0), dtype=self.dtype)
+            with open(vectors_path + ".tmp", "wb") as f:
+                np.save(f, matrix)
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "metadatas": self._metadatas}, f)
+            os.replace(vectors_path + ".tmp", vectors_path)
+            os.replace(meta_path + ".tmp", meta_path)
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= Config.NUMPY_INDEX_FLUSH_SECONDS:
+            self.flush()
+
+    # Storage
+
+    def _ensure_capacity(self, rows: int, dim: int):
+        needed = self._size + rows
+        if self._matrix is not None and self._matrix.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self._matrix.shape[1]}")
+        writable = self._matrix is not None and not isinstance(self._matrix, np.memmap)
+        if writable and self._matrix.shape[0] >= needed:
+            return
+        capacity = max(needed, 2 * (self._matrix.shape[0] if self._matrix is not None else 0), 1024)
+        matrix = np.zeros((capacity, dim), dtype=self.dtype)
+        alive = np.zeros(capacity, dtype=bool)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+        self._matrix = matrix
+        self._alive = alive
+
+    def _maybe_compact(self):
+        # Tombstones are compacted once they make up a quarter of the matrix
+        if self._size - len(self._row_of) > max(1024, self._size // 4):
+            self._compact()
+
+    def _compact(self):
+        # Builds new arrays and lists rather than editing them, so snapshots held by searches stay valid
+        if self._size == len(self._row_of):
+            return
+        keep = np.flatnonzero(self._alive[:self._size])
+        self._matrix = np.ascontiguousarray(self._matrix[keep])
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._ids = [self._ids[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._row_of = {vector_id: row for row, vector_id in enumerate(self._ids)}
+        self._size = len(keep)
+        self._concept_rows = None
+        self._upcast = {}
+        self._invalidate_masks()
+
+    def _invalidate_masks(self):
+        self._masks = {}
+        self._value_rows = {}
+
+    @staticmethod
+    def _normalize(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def upsert(self, ids: List[str], embeddings: Sequence[Sequence[float]], metadatas: List[Dict]):
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            self._ensure_capacity(len(ids), vectors.shape[1])
+            for vector_id, vector, metadata in zip(ids, vectors, metadatas):
+                # A replaced vector gets a new row instead of being overwritten, so a search
+                # scoring an earlier snapshot never reads a half-written row
+                old_row = self._row_of.get(vector_id)
+                if old_row is not None:
+                    self._alive[old_row] = False
+                    self._metadatas[old_row] = None
+                row = self._size
+                self._size += 1
+                self._ids.append(vector_id)
+                self._metadatas.append(metadata)
+                self._row_of[vector_id] = row
+                self._matrix[row] = vector
+                self._alive[row] = True
+                if self._concept_rows is not None:
+                    self._index_concepts(row, metadata)
+            self._invalidate_masks()
+            self._dirty = True
+            self._maybe_compact()
+            self._maybe_flush()
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            for vector_id in ids:
+                row = self._row_of.pop(vector_id, None)
+                if row is None:
+                    continue
+                self._alive[row] = False
+                self._metadatas[row] = None
+            self._invalidate_masks()
+            self._dirty = True
+            self._maybe_compact()
+            self._maybe_flush()
+
+    def count(self) -> int:
+        return len(self._row_of)
+
+    # Filters
+
+    def _rows_by_value(self, key: str) -> Dict[Any, List[int]]:
+        index = self._value_rows.get(key)
+        if index is None:
+            index = {}
+            for row, metadata in enumerate(self._metadatas[:self._size]):
+                if metadata is not None and key in metadata:
+                    value = metadata[key]
+                    index.setdefault(tuple(value) if isinstance(value, list) else value, []).append(row)
+            self._value_rows[key] = index
+        return index
+
+    def _field_mask(self, key: str, op: str, value: Any) -> np.ndarray:
+        cache_key = (key, op, tuple(value) if isinstance(value, list) else value)
+        mask = self._masks.get(cache_key)
+        if mask is not None:
+            return mask
+
+        mask = np.zeros(self._size, dtype=bool)
+        if op in ("$eq", "$ne", "$in", "$nin"):
+            index = self._rows_by_value(key)
+            values = value if op in ("$in", "$nin") else [value]
+            for v in values:
+                rows = index.get(v)
+                if rows:
+                    mask[rows] = True
+            if op in ("$ne", "$nin"):
+                mask = ~mask
+        elif op == "$contains":
+            for row, metadata in enumerate(self._metadatas[:self._size]):
+                field = metadata.get(key) if metadata is not None else None
+                if isinstance(field, (str, list)) and value in field:
+                    mask[row] = True
+        else:
+            raise ValueError(f"Unsupported filter operator {op}")
+
+        self._masks[cache_key] = mask
+        return mask
+
+    def _where_mask(self, where: Dict) -> np.ndarray:
+        mask = np.ones(self._size, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for sub in condition:
+                    mask &= self._where_mask(sub)
+            elif key == "$or":
+                any_mask = np.zeros(self._size, dtype=bool)
+                for sub in condition:
+                    any_mask |= self._where_mask(sub)
+                mask &= any_mask
+            elif isinstance(condition, dict):
+                for op, value in condition.items():
+                    mask &= self._field_mask(key, op, value)
+            else:
+                mask &= self._field_mask(key, "$eq", condition)
+        return mask
+
+    @staticmethod
+    def _concept_keys(metadata: Optional[Dict]) -> Set[str]:
+        return {normalize_concept(c) for c in split_concepts((metadata or {}).get("concepts"))} - {""}
+
+    def _index_concepts(self, row: int, metadata: Optional[Dict]):
+        for key in self._concept_keys(metadata):
+            self._concept_rows.setdefault(key, array('i')).append(row)
+            self._concept_arrays.pop(key, None)
+
+    def _concept_mask(self, concepts: FrozenSet[str]) -> np.ndarray:
+        cache_key = ("$concepts", concepts)
+        mask = self._masks.get(cache_key)
+        if mask is not None:
+            return mask
+        if self._concept_rows is None:
+            self._concept_rows, self._concept_arrays = {}, {}
+            for row, metadata in enumerate(self._metadatas[:self._size]):
+                self._index_concepts(row, metadata)
+
+        mask = np.zeros(self._size, dtype=bool)
+        for key in concepts:
+            rows = self._concept_arrays.get(key)
+            if rows is None:
+                posting = self._concept_rows.get(key)
+                if posting is None:
+                    continue
+                # A copy, since the posting keeps growing and must not have its buffer exported
+                rows = self._concept_arrays[key] = np.array(posting, dtype=np.intp)
+            mask[rows] = True
+        self._masks[cache_key] = mask
+        return mask
+
+    # Search
+
+    @staticmethod
+    def _scores(queries: np.ndarray, matrix: np.ndarray, upcast: Dict[int, np.ndarray]) -> np.ndarray:
+        if matrix.dtype == np.float32:
+            return queries @ matrix.T
+        # float16 has no BLAS path, so blocks are scored in float32. Rows are never rewritten,
+        # so a full block's upcast copy stays valid until compaction and is kept while the
+        # copies fit in NUMPY_INDEX_UPCAST_CACHE_MB; the rest are upcast on every query
+        budget = Config.NUMPY_INDEX_UPCAST_CACHE_MB * 2 ** 20 // (_SCORE_BLOCK * matrix.shape[1] * 4)
+        scores = np.empty((queries.shape[0], matrix.shape[0]), dtype=np.float32)
+        for start in range(0, matrix.shape[0], _SCORE_BLOCK):
+            index = start // _SCORE_BLOCK
+            block = upcast.get(index)
+            if block is None:
+                block = matrix[start:start + _SCORE_BLOCK].astype(np.float32)
+                if len(block) == _SCORE_BLOCK and len(upcast) < budget:
+                    upcast[index] = block
+            scores[:, start:start + _SCORE_BLOCK] = queries @ block.T
+        return scores
+
+    def _ids_mask(self, ids: List[str]) -> np.ndarray:
+        mask = np.zeros(self._size, dtype=bool)
+        rows = [self._row_of[vector_id] for vector_id in ids if vector_id in self._row_of]
+        mask[rows] = True
+        return mask
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int,
+              where: Optional[Dict] = None, ids: Optional[List[str]] = None,
+              concepts: Optional[FrozenSet[str]] = None) -> List[List[Dict[str, Any]]]:
+        queries = self._normalize(query_embeddings)
+        # Only the mask and the snapshot are taken under the lock; scoring and ranking run
+        # outside it, so concurrent searches overlap and writers are not held up by a matmul
+        with self._lock:
+            if self._matrix is None or not self._row_of:
+                return [[] for _ in range(queries.shape[0])]
+            mask = self._alive[:self._size].copy()
+            if where:
+                mask &= self._where_mask(where)
+            if ids is not None:
+                mask &= self._ids_mask(ids)
+            if concepts is not None:
+                mask &= self._concept_mask(concepts)
+            matrix, row_ids, metadatas = self._matrix[:self._size], self._ids, self._metadatas
+            upcast = self._upcast
+
+        candidates = int(mask.sum())
+        k = min(n_results, candidates)
+        if k == 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        scores = self._scores(queries, matrix, upcast)
+        if candidates < matrix.shape[0]:
+            scores[:, ~mask] = -np.inf
+
+        matches = []
+        for row_scores in scores:
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            top = top[np.argsort(-row_scores[top])]
+            # A row deleted or replaced since the snapshot has lost its metadata; drop it
+            matches.append([{
+                "id": row_ids[row],
+                "score": float(row_scores[row]),
+                "metadata": metadatas[row]
+            } for row in top if metadatas[row] is not None])
+        return matches
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> Dict[str, List]:
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[vector_id] for vector_id in ids if vector_id in self._row_of]
+                if where:
+                    mask = self._where_mask(where)
+                    rows = [row for row in rows if mask[row]]
+            else:
+                mask = self._alive[:self._size]
+                if where:
+                    mask = mask & self._where_mask(where)
+                rows = np.flatnonzero(mask).tolist()
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "metadatas": [self._metadatas[row] for row in rows],
+            }
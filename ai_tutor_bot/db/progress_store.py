@@ -0,0 +1,152 @@
+import time
+import atexit
+import sqlite3
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# (review_count, last_review_epoch, next_due_epoch)
+ProgressRecord = Tuple[int, float, float]
+
+
+class ProgressStore:
+    """Durable spaced-repetition state, one compact row per (user, concept).
+
+    Rows live in SQLite with an index on (user_id, next_due), so "what is due
+    for this user" is a range scan rather than a pass over every concept.
+    Writes are buffered and committed in batches; reads see buffered writes.
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 flush_batch: Optional[int] = None,
+                 flush_seconds: Optional[float] = None):
+        self.path = path or Config.PROGRESS_DB_PATH
+        self.flush_batch = flush_batch or Config.PROGRESS_FLUSH_BATCH
+        self.flush_seconds = Config.PROGRESS_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._lock = threading.RLock()
+        self._pending: Dict[Tuple[str, str], ProgressRecord] = {}
+        self._last_flush = time.monotonic()
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS progress ("
+            " user_id TEXT NOT NULL,"
+            " concept TEXT NOT NULL,"
+            " review_count INTEGER NOT NULL,"
+            " last_review REAL NOT NULL,"
+            " next_due REAL NOT NULL,"
+            " PRIMARY KEY (user_id, concept)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS progress_due ON progress (user_id, next_due)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS progress_recent ON progress (user_id, last_review)")
+        self._conn.commit()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def next_due(review_count: int, last_review: float) -> float:
+        interval_idx = min(review_count - 1, len(Config.REPETITION_INTERVALS) - 1)
+        return last_review + Config.REPETITION_INTERVALS[interval_idx] * 86400.0
+
+    def get_many(self, user_id: str, concepts: Iterable[str]) -> Dict[str, ProgressRecord]:
+        concepts = list(dict.fromkeys(concepts))
+        records = {}
+        with self._lock:
+            for start in range(0, len(concepts), 500):
+                batch = concepts[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT concept, review_count, last_review, next_due FROM progress"
+                    f" WHERE user_id = ? AND concept IN ({','.join('?' * len(batch))})",
+                    [user_id, *batch]
+                ).fetchall()
+                for concept, count, last, due in rows:
+                    records[concept] = (count, last, due)
+            for concept in concepts:
+                pending = self._pending.get((user_id, concept))
+                if pending is not None:
+                    records[concept] = pending
+        return records
+
+    def get(self, user_id: str, concept: str) -> Optional[ProgressRecord]:
+        return self.get_many(user_id, [concept]).get(concept)
+
+    def record_reviews(self, reviews: Iterable[Tuple[str, str]], now: Optional[float] = None) -> Dict[Tuple[str, str], float]:
+        """Record one review per (user_id, concept) pair and return each pair's next due epoch"""
+        now = time.time() if now is None else now
+        result = {}
+        with self._lock:
+            by_user: Dict[str, List[str]] = {}
+            for user_id, concept in reviews:
+                by_user.setdefault(user_id, []).append(concept)
+            for user_id, concepts in by_user.items():
+                existing = self.get_many(user_id, concepts)
+                for concept in concepts:
+                    count = existing[concept][0] + 1 if concept in existing else 1
+                    record = (count, now, self.next_due(count, now))
+                    existing[concept] = record
+                    self._pending[(user_id, concept)] = record
+                    result[(user_id, concept)] = record[2]
+            if len(self._pending) >= self.flush_batch or time.monotonic() - self._last_flush >= self.flush_seconds:
+                self.flush()
+        return result
+
+    def record_review(self, user_id: str, concept: str, now: Optional[float] = None) -> float:
+        return self.record_reviews([(user_id, concept)], now)[(user_id, concept)]
+
+    def _pending_for(self, user_id: str) -> Dict[str, ProgressRecord]:
+        # The buffer holds at most flush_batch entries, so this scan stays small
+        return {concept: record for (user, concept), record in self._pending.items() if user == user_id}
+
+    def due_concepts(self, user_id: str, now: Optional[float] = None, limit: int = 50) -> List[str]:
+        """Concepts whose review is due, most overdue first"""
+        now = time.time() if now is None else now
+        with self._lock:
+            pending = self._pending_for(user_id)
+            rows = self._conn.execute(
+                "SELECT concept, next_due FROM progress WHERE user_id = ? AND next_due <= ? ORDER BY next_due LIMIT ?",
+                (user_id, now, limit + len(pending))
+            ).fetchall()
+        due = {concept: next_due for concept, next_due in rows if concept not in pending}
+        due.update((concept, record[2]) for concept, record in pending.items() if record[2] <= now)
+        return sorted(due, key=due.get)[:limit]
+
+    def recent_concepts(self, user_id: str, limit: Optional[int] = None) -> List[str]:
+        """Concepts the user reviewed, most recent first"""
+        with self._lock:
+            pending = self._pending_for(user_id)
+            rows = self._conn.execute(
+                "SELECT concept, last_review FROM progress WHERE user_id = ? ORDER BY last_review DESC LIMIT ?",
+                (user_id, -1 if limit is None else limit + len(pending))
+            ).fetchall()
+        recent = {concept: last_review for concept, last_review in rows if concept not in pending}
+        recent.update((concept, record[1]) for concept, record in pending.items())
+        ordered = sorted(recent, key=recent.get, reverse=True)
+        return ordered if limit is None else ordered[:limit]
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                self._last_flush = time.monotonic()
+                return
+            rows = [(user_id, concept, *record) for (user_id, concept), record in self._pending.items()]
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO progress (user_id, concept, review_count, last_review, next_due)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        rows
+                    )
+                self._pending.clear()
+            except sqlite3.Error as e:
+                logger.error(f"Progress flush failed, keeping {len(rows)} updates buffered: {e}")
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        with self._lock:
+            self._conn.close()
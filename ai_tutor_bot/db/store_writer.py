@@ -0,0 +1,228 @@
+import asyncio
+import threading
+import collections
+import queue
+import logging
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.executor import InferenceExecutor
+from ai_tutor_bot.db.progress_store import ProgressRecord
+
+logger = logging.getLogger(__name__)
+
+
+class WriterError(RuntimeError):
+    """Raised in a worker when a call failed inside the store writer"""
+
+
+class StoreWriter:
+    """Single owner of the vector store and the progress store for a pool of worker processes.
+
+    Workers send retrieval, ingestion and progress calls over multiprocessing
+    connections; each connection is served by its own thread and async calls
+    run on the writer's event loop. Chroma's files and the SQLite progress
+    database are only ever opened here, and progress reads see buffered writes.
+    """
+
+    def __init__(self, agent: Any, listener: Listener):
+        self.agent = agent
+        self.listener = listener
+        self.generation = 0
+        # (generation, doc_ids) of recent ingestion invalidations, for workers' answer caches
+        self._invalidations: collections.deque = collections.deque(maxlen=Config.SERVER_INVALIDATION_LOG)
+        self._lock = threading.Lock()
+        self._ingest_lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        agent.invalidation_listeners.append(self._invalidate)
+
+        store = agent.learning_system.store
+        self._ops: Dict[str, Callable[..., Any]] = {
+            "query": lambda *args, **kwargs: self._run(agent.db_manager.async_query(*args, **kwargs)),
+            "query_batch": lambda *args, **kwargs: self._run(agent.db_manager.async_query_batch(*args, **kwargs)),
+            "ingest": self._ingest,
+            "get_many": store.get_many,
+            "record_reviews": store.record_reviews,
+            "due_concepts": store.due_concepts,
+            "recent_concepts": store.recent_concepts,
+            "invalidations": self._invalidations_since,
+        }
+
+    def _run(self, coro) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _ingest(self, documents: List[Dict[str, str]]) -> Dict[str, float]:
+        # One ingestion at a time; queries keep being served meanwhile
+        with self._ingest_lock:
+            return self._run(self.agent.ingest_documents(documents))
+
+    def _invalidate(self, doc_ids: Optional[List[str]]):
+        # None means new documents were added and every cached answer is stale
+        with self._lock:
+            self.generation += 1
+            self._invalidations.append(
+                (self.generation, None if doc_ids is None else [doc_id for doc_id in doc_ids if doc_id]))
+
+    def _invalidations_since(self, generation: int) -> Optional[List[str]]:
+        """Doc ids invalidated after generation, or None when everything cached should be dropped"""
+        with self._lock:
+            oldest = self._invalidations[0][0] if self._invalidations else self.generation + 1
+            if oldest > generation + 1:
+                return None
+            if any(doc_ids is None for gen, doc_ids in self._invalidations if gen > generation):
+                return None
+            return sorted({doc_id for gen, doc_ids in self._invalidations if gen > generation for doc_id in doc_ids})
+
+    def serve(self):
+        """Accept worker connections until the process is stopped, then flush both stores"""
+        threading.Thread(target=self._loop.run_forever, name="store-writer-loop", daemon=True).start()
+        self._run(self.agent.db_manager.async_open())
+        logger.info(f"Store writer listening on {self.listener.address}")
+        try:
+            while True:
+                try:
+                    conn = self.listener.accept()
+                except AuthenticationError as e:
+                    logger.warning(f"Rejected store writer connection: {e}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,),
+                                 name="store-writer-conn", daemon=True).start()
+        finally:
+            self.close()
+
+    def _serve_connection(self, conn: Connection):
+        with conn:
+            while True:
+                try:
+                    op, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ("ok", self._ops[op](*args, **kwargs))
+                except Exception as e:
+                    logger.error(f"Store writer call '{op}' failed: {e}")
+                    reply = ("error", f"{type(e).__name__}: {e}")
+                conn.send((*reply, self.generation))
+
+    def close(self):
+        try:
+            self._run(self.agent.db_manager.async_flush())
+        except Exception as e:
+            logger.error(f"Vector store flush on shutdown failed: {e}")
+        self.agent.learning_system.store.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class StoreClient:
+    """Worker-side connections to the StoreWriter; call() blocks and is thread-safe.
+
+    Every reply carries the writer's invalidation generation. When it moves,
+    on_invalidate is called with the doc ids re-written since (None when they
+    are no longer known or documents were added, meaning everything cached
+    should be dropped).
+    """
+
+    def __init__(self, address: Any, authkey: bytes,
+                 on_invalidate: Optional[Callable[[Optional[List[str]]], None]] = None):
+        self.address = address
+        self.authkey = authkey
+        self.on_invalidate = on_invalidate
+        self.generation = 0
+        self._idle: "queue.SimpleQueue[Connection]" = queue.SimpleQueue()
+        self._generation_lock = threading.Lock()
+
+    def call(self, op: str, *args, **kwargs) -> Any:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = Client(self.address, authkey=self.authkey)
+        try:
+            conn.send((op, args, kwargs))
+            status, result, generation = conn.recv()
+        except Exception:
+            conn.close()
+            raise
+        self._idle.put(conn)
+
+        if generation != self.generation:
+            self._catch_up(generation)
+        if status != "ok":
+            raise WriterError(result)
+        return result
+
+    def _catch_up(self, generation: int):
+        with self._generation_lock:
+            if generation <= self.generation:
+                return
+            since, self.generation = self.generation, generation
+        if self.on_invalidate is None:
+            return
+        try:
+            doc_ids = self.call("invalidations", since)
+        except Exception as e:
+            logger.error(f"Could not fetch invalidated documents: {e}")
+            doc_ids = None
+        self.on_invalidate(doc_ids)
+
+
+class RemoteVectorDB:
+    """Stands in for VectorDBManager in a worker; retrieval runs in the store writer"""
+
+    def __init__(self, client: StoreClient, executor: Optional[InferenceExecutor] = None):
+        self.client = client
+        self.executor = executor or InferenceExecutor()
+
+    def open(self):
+        pass
+
+    async def async_open(self):
+        pass
+
+    async def async_query(self, vector: Any, filter: Optional[Dict] = None,
+                          concepts: Optional[Iterable[str]] = None,
+                          query_text: Optional[str] = None) -> List[Dict]:
+        return await self.executor.run("retrieve", self.client.call, "query", vector, filter=filter,
+                                       concepts=list(concepts) if concepts else None, query_text=query_text)
+
+    async def async_query_batch(self, vectors: Any, filter: Optional[Dict] = None,
+                                concepts: Optional[List[Optional[Iterable[str]]]] = None,
+                                query_texts: Optional[List[Optional[str]]] = None) -> List[List[Dict]]:
+        if concepts is not None:
+            concepts = [list(query_concepts) if query_concepts else None for query_concepts in concepts]
+        return await self.executor.run("retrieve", self.client.call, "query_batch", vectors, filter=filter,
+                                       concepts=concepts, query_texts=query_texts)
+
+    async def async_flush(self):
+        pass
+
+
+class RemoteProgressStore:
+    """Stands in for ProgressStore in a worker; the writer buffers and commits the updates"""
+
+    def __init__(self, client: StoreClient):
+        self.client = client
+
+    def get_many(self, user_id: str, concepts: Iterable[str]) -> Dict[str, ProgressRecord]:
+        return self.client.call("get_many", user_id, list(concepts))
+
+    def get(self, user_id: str, concept: str) -> Optional[ProgressRecord]:
+        return self.get_many(user_id, [concept]).get(concept)
+
+    def record_reviews(self, reviews: Iterable[Tuple[str, str]], now: Optional[float] = None) -> Dict[Tuple[str, str], float]:
+        return self.client.call("record_reviews", list(reviews), now)
+
+    def record_review(self, user_id: str, concept: str, now: Optional[float] = None) -> float:
+        return self.record_reviews([(user_id, concept)], now)[(user_id, concept)]
+
+    def due_concepts(self, user_id: str, now: Optional[float] = None, limit: int = 50) -> List[str]:
+        return self.client.call("due_concepts", user_id, now, limit)
+
+    def recent_concepts(self, user_id: str, limit: Optional[int] = None) -> List[str]:
+        return self.client.call("recent_concepts", user_id, limit)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
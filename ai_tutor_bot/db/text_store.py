@@ -0,0 +1,52 @@
+import sqlite3
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class TextStore:
+    """Chunk text keyed by vector id, stored once instead of in every vector's metadata.
+
+    Retrieval only needs the text of the few chunks it returns, so the vector
+    backend's metadata (loaded for every match and, for the NumPy backend,
+    held in memory for every row) stays small.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.TEXT_STORE_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, text TEXT NOT NULL) WITHOUT ROWID")
+        self._conn.commit()
+
+    def put_many(self, ids: List[str], texts: List[str]):
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO chunks (id, text) VALUES (?, ?)", zip(ids, texts))
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, str]:
+        ids = list(dict.fromkeys(ids))
+        texts = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                texts.update(self._conn.execute(
+                    f"SELECT id, text FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall())
+        return texts
+
+    def delete(self, ids: List[str]):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", ((vector_id,) for vector_id in ids))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
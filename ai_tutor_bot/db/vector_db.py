@@ -1,72 +1,381 @@
-import chromadb
 import numpy as np
+import threading
 import logging
-from typing import List, Dict, Tuple, Optional
+from typing import Awaitable, Callable, List, Dict, Optional, Iterable, Sequence, FrozenSet, Tuple
 from ai_tutor_bot.utils.config import Config
-from chromadb.utils import embedding_functions
+from ai_tutor_bot.utils.executor import InferenceExecutor, ExecutorOverloaded
+from ai_tutor_bot.db.base import VectorBackend
+from ai_tutor_bot.db.concept_index import ConceptIndex, split_concepts
+from ai_tutor_bot.db.bm25_index import BM25Index, reciprocal_rank_fusion
+from ai_tutor_bot.db.text_store import TextStore
+from ai_tutor_bot.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+
+def create_backend(name: Optional[str] = None) -> VectorBackend:
+    name = name or Config.VECTOR_BACKEND
+    # Imported on demand so the NumPy backend works without chromadb installed
+    if name == "chroma":
+        from ai_tutor_bot.db.chroma_backend import ChromaBackend
+        return ChromaBackend()
+    if name == "numpy":
+        from ai_tutor_bot.db.numpy_backend import NumpyBackend
+        return NumpyBackend()
+    raise ValueError(f"Unknown vector backend '{name}'")
+
+
 class VectorDBManager:
-    def __init__(self):
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(path="./chroma_db")
-        
-        # Create or get collection
-        self.sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=Config.EMBEDDING_MODEL
-        )
-        
-        self.collection = self.client.get_or_create_collection(
-            name=Config.INDEX_NAME,
-            embedding_function=self.sentence_transformer_ef,
-            metadata={"hnsw:space": "cosine"}
-        )
-
-    async def async_upsert(self, vectors: List[Tuple[str, List[float], Dict]]):
-        # Prepare data for ChromaDB
-        ids = []
-        embeddings = []
-        metadatas = []
-        
-        for vector_id, embedding, metadata in vectors:
-            ids.append(vector_id)
-            embeddings.append(embedding)
-            metadatas.append(metadata)
-        
-        # Add to collection
+    def __init__(self, executor: Optional[InferenceExecutor] = None, backend: Optional[VectorBackend] = None):
+        self.executor = executor or InferenceExecutor()
+        # The backend client and side indexes are opened on first use (see open())
+        self._backend = backend
+        self._concept_index: Optional[ConceptIndex] = None
+        self._bm25_index: Optional[BM25Index] = None
+        self._text_store: Optional[TextStore] = None
+        self._opened = False
+        self._open_lock = threading.Lock()
+
+    def open(self):
+        """Create the backend and load the side indexes; blocking, so callers run it on the executor"""
+        if self._opened:
+            return
+        with self._open_lock:
+            if self._opened:
+                return
+            if self._backend is None:
+                self._backend = create_backend()
+            self._concept_index = ConceptIndex()
+            self._bm25_index = BM25Index()
+            self._text_store = TextStore()
+            if self._indexes_stale():
+                self._rebuild_indexes()
+            self._opened = True
+
+    def _indexes_stale(self) -> bool:
+        # Side index files are shared by both backends and can outlive the store they were built
+        # from, so a size that disagrees with the store means they describe other chunks
         try:
-            self.collection.upsert(
-                ids=ids,
-                embeddings=embeddings,
-                metadatas=metadatas
-            )
+            count = self._backend.count()
+        except Exception as e:
+            logger.error(f"Could not check side indexes: {e}")
+            return False
+        return (not (self._concept_index.loaded and self._bm25_index.loaded)
+                or len(self._concept_index) != count
+                or len(self._bm25_index) != count
+                or self._text_store.count() < count)
+
+    async def async_open(self):
+        if not self._opened:
+            await self.executor.run("open", self.open, timeout=0)
+
+    @property
+    def backend(self) -> VectorBackend:
+        self.open()
+        return self._backend
+
+    @property
+    def concept_index(self) -> ConceptIndex:
+        self.open()
+        return self._concept_index
+
+    @property
+    def bm25_index(self) -> BM25Index:
+        self.open()
+        return self._bm25_index
+
+    @property
+    def text_store(self) -> TextStore:
+        self.open()
+        return self._text_store
+
+    def _rebuild_indexes(self):
+        # One-off migration for collections ingested before the side indexes and the text store
+        # existed; those kept the chunk text in metadata
+        try:
+            rows = self._backend.get()
+        except Exception as e:
+            logger.error(f"Could not rebuild side indexes: {e}")
+            return
+        self._concept_index.clear()
+        self._bm25_index.clear()
+        stored = self._text_store.get_many(rows["ids"])
+        texts = [stored.get(vector_id) or (metadata or {}).get("text", "")
+                 for vector_id, metadata in zip(rows["ids"], rows["metadatas"])]
+        missing = [(vector_id, text) for vector_id, text in zip(rows["ids"], texts) if vector_id not in stored]
+        if missing:
+            self._text_store.put_many([vector_id for vector_id, _ in missing], [text for _, text in missing])
+        self._index_chunks(rows["ids"], rows["metadatas"], texts)
+        self._concept_index.flush()
+        self._bm25_index.flush()
+        logger.info(f"Rebuilt concept, BM25 and text indexes from {len(rows['ids'])} stored chunks")
+
+    def _index_chunks(self, ids: List[str], metadatas: List[Dict], texts: List[str]):
+        self._concept_index.add((vector_id, split_concepts((metadata or {}).get("concepts")))
+                                for vector_id, metadata in zip(ids, metadatas))
+        self._bm25_index.add(zip(ids, texts))
+
+    def _store_batch(self, ids: List[str], embeddings: np.ndarray, metadatas: List[Dict], texts: List[str]):
+        # Vectors, text and both side indexes in one executor call, so BM25 tokenization and
+        # concept indexing stay off the event loop serving queries
+        self.backend.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas)
+        self.text_store.put_many(ids, texts)
+        self._index_chunks(ids, metadatas, texts)
+
+    def _delete_batch(self, ids: List[str]):
+        self.backend.delete(ids)
+        self.text_store.delete(ids)
+        self.concept_index.remove(ids)
+        self.bm25_index.remove(ids)
+
+    async def async_upsert(self, ids: List[str], embeddings: np.ndarray, metadatas: List[Dict], texts: List[str]) -> bool:
+        """Store a batch of chunks in order, stopping at the first failure; True if all were stored
+
+        embeddings is an (n, dim) array passed to the backend as is.
+        """
+        await self.async_open()
+        if Config.CHUNK_TEXT_IN_METADATA:
+            metadatas = [{**metadata, "text": text} for metadata, text in zip(metadatas, texts)]
+
+        # Add to collection in batches below the backend's per-call limit
+        batch_size = min(Config.UPSERT_BATCH_SIZE, self.backend.max_batch_size())
+        try:
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                await self.executor.run(
+                    "upsert",
+                    self._store_batch,
+                    ids[start:end],
+                    embeddings[start:end],
+                    metadatas[start:end],
+                    texts[start:end],
+                    timeout=0
+                )
+            return True
+        except ExecutorOverloaded:
+            raise
         except Exception as e:
             logger.error(f"Vector upsert failed: {e}")
+            metrics.inc("errors_total", stage="upsert")
+            return False
+
+    async def async_get_fingerprints(self, doc_ids: List[str]) -> Dict[str, str]:
+        """Stored content fingerprint per document, read from each document's first chunk"""
+        await self.async_open()
+        fingerprints = {}
+        for start in range(0, len(doc_ids), Config.DB_GET_BATCH_SIZE):
+            batch = doc_ids[start:start + Config.DB_GET_BATCH_SIZE]
+            where = {"$and": [{"doc_id": {"$in": batch}}, {"chunk_id": "0"}]}
+            try:
+                rows = await self.executor.run("lookup", self.backend.get, where=where, timeout=0)
+            except ExecutorOverloaded:
+                raise
+            except Exception as e:
+                logger.error(f"Fingerprint lookup failed: {e}")
+                continue
+            for metadata in rows["metadatas"]:
+                if metadata and metadata.get("doc_hash"):
+                    fingerprints[metadata["doc_id"]] = metadata["doc_hash"]
+        return fingerprints
+
+    async def async_get_chunk_ids(self, doc_ids: List[str]) -> Dict[str, List[str]]:
+        await self.async_open()
+        chunk_ids = {doc_id: [] for doc_id in doc_ids}
+        for start in range(0, len(doc_ids), Config.DB_GET_BATCH_SIZE):
+            batch = doc_ids[start:start + Config.DB_GET_BATCH_SIZE]
+            try:
+                rows = await self.executor.run("lookup", self.backend.get, where={"doc_id": {"$in": batch}}, timeout=0)
+            except ExecutorOverloaded:
+                raise
+            except Exception as e:
+                logger.error(f"Chunk lookup failed: {e}")
+                continue
+            for vector_id, metadata in zip(rows["ids"], rows["metadatas"]):
+                chunk_ids.setdefault(metadata.get("doc_id", ""), []).append(vector_id)
+        return chunk_ids
 
-    async def async_query(self, vector: List[float], filter: Optional[Dict] = None) -> List[Dict]:
-        # Convert to numpy array
-        query_embedding = np.array(vector).reshape(1, -1).tolist()[0]
-        
+    async def async_delete(self, ids: List[str]):
+        if not ids:
+            return
+        await self.async_open()
         try:
-            # Query ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=Config.TOP_K,
-                where=filter,
-                include=["metadatas", "distances"]
-            )
-            
-            # Format results
-            matches = []
-            for i in range(len(results["ids"][0])):
-                matches.append({
-                    "id": results["ids"][0][i],
-                    "score": 1 - results["distances"][0][i],  # Convert distance to similarity
-                    "metadata": results["metadatas"][0][i]
-                })
-            
-            return matches
+            for start in range(0, len(ids), Config.DB_GET_BATCH_SIZE):
+                batch = ids[start:start + Config.DB_GET_BATCH_SIZE]
+                await self.executor.run("delete", self._delete_batch, batch, timeout=0)
+        except ExecutorOverloaded:
+            raise
+        except Exception as e:
+            logger.error(f"Vector delete failed: {e}")
+            metrics.inc("errors_total", stage="delete")
+
+    async def async_query(self, vector: np.ndarray, filter: Optional[Dict] = None,
+                          concepts: Optional[Iterable[str]] = None,
+                          query_text: Optional[str] = None) -> List[Dict]:
+        results = await self.async_query_batch([vector], filter, [concepts], [query_text])
+        return results[0]
+
+    def _concept_filter(self, concepts: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+        # Restrict to chunks that mention any of the concepts; none known means search everything
+        if not concepts:
+            return None
+        known = self.concept_index.known(concepts)
+        if not known:
+            metrics.inc("fallbacks_total", kind="unfiltered_retrieval")
+            return None
+        return known
+
+    def _narrow_ids(self, concepts: FrozenSet[str]) -> Optional[List[str]]:
+        """Candidate ids when the filter is small enough to pass as a list, else None"""
+        if self.concept_index.candidate_bound(concepts) > Config.CONCEPT_FILTER_MAX_IDS:
+            return None
+        return list(self.concept_index.chunks_for(concepts))
+
+    def _dense_search(self, queries: np.ndarray, n_results: int, filter: Optional[Dict],
+                      concepts: Optional[FrozenSet[str]]) -> List[List[Dict]]:
+        """Backend search under a concept filter; blocking, so it runs on the executor"""
+        if concepts is None:
+            return self.backend.query(queries, n_results, filter)
+        if self.backend.filters_concepts:
+            return self.backend.query(queries, n_results, filter, concepts=concepts)
+        ids = self._narrow_ids(concepts)
+        if ids is not None:
+            return self.backend.query(queries, n_results, filter, ids)
+
+        # A broad filter covers much of the corpus, so over-fetch without it and keep the matches
+        # that mention a concept; queries left short are answered exactly from the full id list
+        fetched = self.backend.query(queries, n_results * Config.CONCEPT_FILTER_OVERFETCH, filter)
+        allowed = self.concept_index.mentioning({match["id"] for matches in fetched for match in matches}, concepts)
+        results = [[match for match in matches if match["id"] in allowed][:n_results] for matches in fetched]
+        short = [i for i, matches in enumerate(results) if len(matches) < n_results]
+        if short:
+            exact = self.backend.query(queries[short], n_results, filter, list(self.concept_index.chunks_for(concepts)))
+            for i, matches in zip(short, exact):
+                results[i] = matches
+        return results
+
+    def _keyword_search(self, text: str, limit: int, concepts: Optional[FrozenSet[str]]) -> List[Tuple[str, float]]:
+        if concepts is None:
+            return self.bm25_index.search(text, limit)
+        ids = self._narrow_ids(concepts)
+        if ids is not None:
+            return self.bm25_index.search(text, limit, ids)
+        hits = self.bm25_index.search(text, limit * Config.CONCEPT_FILTER_OVERFETCH)
+        allowed = self.concept_index.mentioning([chunk_id for chunk_id, _ in hits], concepts)
+        return [hit for hit in hits if hit[0] in allowed][:limit]
+
+    async def async_query_batch(self, vectors: np.ndarray, filter: Optional[Dict] = None,
+                                concepts: Optional[Sequence[Optional[Iterable[str]]]] = None,
+                                query_texts: Optional[Sequence[Optional[str]]] = None,
+                                run: Optional[Callable[..., Awaitable]] = None) -> List[List[Dict]]:
+        """Results per query; queries with the same candidate chunks share one backend query.
+
+        run replaces executor.run for each call, e.g. so a bulk caller waits out overload
+        per call instead of repeating the whole search.
+        """
+        await self.async_open()
+        run = run or self.executor.run
+        count = len(vectors)
+        concepts = concepts or [None] * count
+        query_texts = query_texts or [None] * count
+        results: List[List[Dict]] = [[] for _ in range(count)]
+
+        concept_filters = [self._concept_filter(query_concepts) for query_concepts in concepts]
+        groups: Dict[Optional[FrozenSet[str]], List[int]] = {}
+        for i, query_filter in enumerate(concept_filters):
+            groups.setdefault(query_filter, []).append(i)
+
+        hybrid = Config.HYBRID_SEARCH and any(query_texts)
+        n_results = max(Config.TOP_K, Config.HYBRID_CANDIDATES) if hybrid else Config.TOP_K
+        matrix = np.asarray(vectors, dtype=np.float32)
+        try:
+            with metrics.span("dense_search"):
+                for query_filter, members in groups.items():
+                    dense = await run(
+                        "retrieve",
+                        self._dense_search,
+                        matrix[members],
+                        n_results,
+                        filter,
+                        query_filter
+                    )
+                    for i, matches in zip(members, dense):
+                        results[i] = matches
+
+                # No results with the concept filter: try unfiltered search
+                retry = [i for i in range(count) if not results[i] and concept_filters[i] is not None]
+                if retry:
+                    logger.info(f"No results with concept filter for {len(retry)} queries, trying unfiltered search")
+                    metrics.inc("fallbacks_total", kind="unfiltered_retrieval")
+                    dense = await run("retrieve", self.backend.query, matrix[retry], n_results, filter, None)
+                    for i, matches in zip(retry, dense):
+                        results[i] = matches
+                        concept_filters[i] = None
+            if hybrid:
+                with metrics.span("keyword_search"):
+                    results = await self._fuse_keyword_hits(results, query_texts, filter, concept_filters, run)
+            return await self._attach_texts(results, run)
+        except ExecutorOverloaded:
+            raise
         except Exception as e:
             logger.error(f"Database query failed: {e}")
-            return []
\ No newline at end of file
+            metrics.inc("errors_total", stage="vector_query")
+            return [[] for _ in range(count)]
+
+    async def _fuse_keyword_hits(self, dense: List[List[Dict]], query_texts: Sequence[Optional[str]],
+                                 filter: Optional[Dict],
+                                 concept_filters: List[Optional[FrozenSet[str]]],
+                                 run: Optional[Callable[..., Awaitable]] = None) -> List[List[Dict]]:
+        run = run or self.executor.run
+        limit = max(Config.TOP_K, Config.HYBRID_CANDIDATES)
+
+        def search_all() -> List[List]:
+            return [self._keyword_search(text, limit, concepts) if text else []
+                    for text, concepts in zip(query_texts, concept_filters)]
+
+        # BM25 scoring grows with the corpus, so it runs on the executor like the dense search
+        sparse = await run("retrieve", search_all)
+        metadata_by_id = {match["id"]: match["metadata"] for results in dense for match in results}
+
+        # Keyword-only hits still need their metadata, and must pass the same filter;
+        # one lookup covers every query in the batch
+        missing = list(dict.fromkeys(
+            chunk_id for hits in sparse for chunk_id, _ in hits if chunk_id not in metadata_by_id))
+        if missing:
+            rows = await run("lookup", self.backend.get, ids=missing, where=filter)
+            metadata_by_id.update(zip(rows["ids"], rows["metadatas"]))
+
+        fused_results = []
+        for results, hits in zip(dense, sparse):
+            if not hits:
+                fused_results.append(results[:Config.TOP_K])
+                continue
+            # Hits this query's dense search did not return have no similarity, so their "score" is None
+            matches = {chunk_id: {"id": chunk_id, "score": None, "metadata": metadata_by_id[chunk_id]}
+                       for chunk_id, _ in hits if chunk_id in metadata_by_id}
+            matches.update((match["id"], match) for match in results)
+            fused = reciprocal_rank_fusion([[match["id"] for match in results], [chunk_id for chunk_id, _ in hits]])
+            fused_results.append([{**matches[chunk_id], "fused_score": score}
+                                  for chunk_id, score in fused if chunk_id in matches][:Config.TOP_K])
+        return fused_results
+
+    async def _attach_texts(self, results: List[List[Dict]],
+                            run: Optional[Callable[..., Awaitable]] = None) -> List[List[Dict]]:
+        """Set each match's "text" with one text store lookup for the whole batch"""
+        run = run or self.executor.run
+        ids = list({match["id"] for matches in results for match in matches})
+        texts = await run("lookup", self.text_store.get_many, ids) if ids else {}
+        for matches in results:
+            for match in matches:
+                # Chunks ingested with CHUNK_TEXT_IN_METADATA, or before the text store, also carry it there
+                match["text"] = texts.get(match["id"]) or (match["metadata"] or {}).get("text", "")
+        return results
+
+    async def async_flush(self):
+        if not self._opened:
+            return
+        try:
+            await self.executor.run("flush", self.backend.flush, timeout=0)
+            await self.executor.run("flush", self.concept_index.flush, timeout=0)
+            await self.executor.run("flush", self.bm25_index.flush, timeout=0)
+        except Exception as e:
+            logger.error(f"Vector index flush failed: {e}")
\ No newline at end of file
@@ -1,44 +1,44 @@
-from datetime import datetime, timedelta
-from typing import List, Dict
+import time
+from datetime import datetime
+from typing import List, Dict, Optional, Iterable, Tuple
 from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.db.progress_store import ProgressStore
 import logging
 
 logger = logging.getLogger(__name__)
 
 class AdaptiveLearningSystem:
-    def __init__(self):
-        self.user_progress = {}  # type: Dict[str, Dict[str, List[datetime]]]
+    def __init__(self, store: Optional[ProgressStore] = None):
+        # Compact (review count, last review, next due) per user/concept, persisted in SQLite
+        self.store = store or ProgressStore()
 
     def update_progress(self, user_id: str, concept: str) -> datetime:
-        if user_id not in self.user_progress:
-            self.user_progress[user_id] = {}
-        
-        if concept not in self.user_progress[user_id]:
-            self.user_progress[user_id][concept] = []
-        
-        self.user_progress[user_id][concept].append(datetime.now())
-        
-        reviews = self.user_progress[user_id][concept]
-        if len(reviews) < len(Config.REPETITION_INTERVALS):
-            next_review = reviews[-1] + timedelta(days=Config.REPETITION_INTERVALS[len(reviews)-1])
-        else:
-            next_review = reviews[-1] + timedelta(days=Config.REPETITION_INTERVALS[-1])
-        
-        return next_review
+        next_review = self.store.record_review(user_id, concept)
+        return datetime.fromtimestamp(next_review)
+
+    def update_progress_batch(self, reviews: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], datetime]:
+        """Record many (user_id, concept) reviews with one store write"""
+        next_reviews = self.store.record_reviews(reviews)
+        return {key: datetime.fromtimestamp(next_review) for key, next_review in next_reviews.items()}
 
     def get_learning_context(self, user_id: str, concepts: List[str]) -> List[str]:
+        now = time.time()
+        records = self.store.get_many(user_id, concepts)
         prioritized = []
         for concept in concepts:
-            if user_id in self.user_progress and concept in self.user_progress[user_id]:
-                reviews = self.user_progress[user_id][concept]
-                last_review = reviews[-1]
-                interval_idx = min(len(reviews) - 1, len(Config.REPETITION_INTERVALS) - 1)
-                due_date = last_review + timedelta(days=Config.REPETITION_INTERVALS[interval_idx])
-                priority = 1 if due_date <= datetime.now() else 0
+            record = records.get(concept)
+            if record is not None:
+                priority = 1 if record[2] <= now else 0
             else:
                 priority = 1
             
             prioritized.append((concept, priority))
         
         prioritized.sort(key=lambda x: (-x[1], x[0]))
-        return [p[0] for p in prioritized]
\ No newline at end of file
+        return [p[0] for p in prioritized]
+
+    def get_due_concepts(self, user_id: str, limit: int = 50) -> List[str]:
+        return self.store.due_concepts(user_id, limit=limit)
+
+    def get_user_concepts(self, user_id: str, limit: Optional[int] = None) -> List[str]:
+        return self.store.recent_concepts(user_id, limit)
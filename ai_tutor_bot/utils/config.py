@@ -10,7 +10,92 @@ class Config:
     QA_MODEL = "deepset/roberta-base-squad2"
     CHUNK_SIZE = 768  # Increased for complex subjects
     CHUNK_OVERLAP = 100
+    CHUNK_MODE = "tokens"  # "tokens" budgets by embedding-model tokens, "words" by whitespace words
+    CHUNK_MAX_TOKENS = 256  # Fits mpnet's 384-token window and leaves room for the question in QA
+    CHUNK_OVERLAP_TOKENS = 32
     TOP_K = 5
     REPETITION_INTERVALS = [1, 3, 7, 14, 30]
-    SIMILARITY_THRESHOLD = 0.85
-    DEVICE = None  # Will be set later
\ No newline at end of file
+    SIMILARITY_THRESHOLD = 0.85  # Query similarity above which a cached answer is reused
+    DEVICE = None  # Will be set later
+
+    # Inference backend
+    DEFER_MODEL_LOADING = True  # Load models on first use or TutorAgent.warmup() instead of in the constructor
+    INFERENCE_BACKEND = "torch"  # "torch", or "onnx" for exported ONNX Runtime models on CPU
+    ONNX_CACHE_DIR = "./onnx_models"  # Exported (and quantized) models, reused across runs
+    ONNX_QUANTIZATION = "avx2"  # Dynamic int8 target: "avx2", "avx512", "avx512_vnni", "arm64"; None keeps fp32
+    ONNX_INTRA_OP_THREADS = 0  # Threads per ONNX Runtime call, 0 lets ONNX Runtime decide
+
+    # Metrics and tracing
+    METRICS_ENABLED = True  # Stage timings and counters; span() is a no-op when off
+    TRACE_REQUESTS = False  # Attach a per-request stage breakdown to every response
+
+    # Inference executor (model and DB calls run off the event loop)
+    EXECUTOR_MAX_WORKERS = os.cpu_count() or 4
+    EXECUTOR_MAX_IN_FLIGHT = os.cpu_count() or 4  # Concurrent calls admitted to the pool
+    EXECUTOR_MAX_QUEUE = 256  # Callers allowed to wait for a slot before rejecting
+    EXECUTOR_TIMEOUT = 30.0  # Seconds per query-path call, 0 disables; ingestion and model loads are untimed
+
+    # HTTP server (server.py)
+    SERVER_HOST = "127.0.0.1"  # Local-only by default
+    SERVER_PORT = 8000
+    SERVER_WORKERS = 2  # Pre-forked worker processes, plus one store writer process
+    SERVER_THREADS_PER_WORKER = 0  # Intra-op threads per worker, 0 splits the CPUs evenly
+    SERVER_MAX_BODY_BYTES = 64 * 1024 * 1024  # Largest accepted request body
+    SERVER_INVALIDATION_LOG = 1024  # Ingestion invalidations kept for workers catching up
+
+    # Micro-batching of concurrent queries
+    BATCH_MAX_WAIT_MS = 5  # How long to hold the first request while a batch fills
+    EMBED_BATCH_MAX_SIZE = 32
+    QA_BATCH_MAX_SIZE = 8
+    ANSWER_BATCH_SIZE = 64  # Questions embedded and retrieved together by TutorAgent.answer_batch()
+    ANSWER_BATCH_OVERLOAD_RETRIES = 6  # Times answer_batch() waits out a full executor before giving up
+    ANSWER_BATCH_OVERLOAD_WAIT = 0.1  # Seconds before the first retry, doubled each time
+
+    # Context selection before QA
+    CONTEXT_SELECTION = True  # Keep only the sentences closest to the query
+    QA_MAX_SEQ_LEN = 384  # Tokens per QA window; the selected context fits in one
+
+    # Embedding cache (memory LRU + memory-mapped disk tier)
+    EMBEDDING_CACHE_ENABLED = True
+    EMBEDDING_CACHE_DIR = "./embedding_cache"
+    EMBEDDING_CACHE_SIZE = 10000  # Vectors kept in the in-memory LRU
+    EMBEDDING_CACHE_DTYPE = "float32"  # Disk tier dtype for new caches; "float16" halves its size
+
+    # Vector DB
+    VECTOR_BACKEND = "chroma"  # "chroma" or "numpy" (exact in-process index)
+    CHROMA_PATH = "./chroma_db"
+    NUMPY_INDEX_PATH = "./numpy_index"
+    NUMPY_INDEX_DTYPE = "float32"  # "float16" halves the index on disk; searched through float32 block copies
+    NUMPY_INDEX_UPCAST_CACHE_MB = 1024  # RAM for cached float32 copies of a float16 index, 0 upcasts every query
+    NUMPY_INDEX_FLUSH_SECONDS = 5.0  # Minimum gap between automatic saves of the NumPy index
+    TEXT_STORE_PATH = "./chunk_text.db"  # Chunk text by vector id, kept out of the vector metadata
+    CHUNK_TEXT_IN_METADATA = False  # Also copy chunk text into metadata (layout before the text store)
+    CONCEPT_INDEX_PATH = "./concept_index.json"
+    CONCEPT_FILTER_MAX_CONCEPTS = 50  # Most recently reviewed concepts used to filter retrieval
+    CONCEPT_FILTER_MAX_IDS = 2048  # Backends without concept postings get at most this many candidate ids
+    CONCEPT_FILTER_OVERFETCH = 4  # Broader filters over-fetch this many times the results and post-filter
+    BM25_INDEX_PATH = "./bm25_index.pkl"
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+    BM25_MAX_DF_RATIO = 0.25  # Query terms in more than this share of chunks are skipped while rarer terms remain (1.0 scores all)
+    HYBRID_SEARCH = True  # Fuse BM25 keyword hits with dense results
+    HYBRID_CANDIDATES = 20  # Results taken from each retriever before fusion
+    RRF_K = 60  # Reciprocal rank fusion damping constant
+    DB_GET_BATCH_SIZE = 500  # Max ids per metadata lookup/delete call
+    UPSERT_BATCH_SIZE = 1000  # Vectors per upsert call
+
+    # Streaming ingestion
+    INGEST_DOC_BATCH_SIZE = 64  # Documents read and chunked together
+    INGEST_QUEUE_DEPTH = 4  # Batches buffered between pipeline stages
+    PREPROCESS_WORKERS = 0  # Processes for chunking/metadata extraction, 0 or 1 runs in-process
+    PREPROCESS_TASK_SIZE = 16  # Documents per task sent to a worker process
+
+    # Semantic answer cache for near-duplicate questions
+    SEMANTIC_CACHE_ENABLED = True
+    SEMANTIC_CACHE_SIZE = 2048  # Cached questions
+    SEMANTIC_CACHE_TTL = 3600  # Seconds, 0 keeps entries until evicted
+
+    # Learning progress store
+    PROGRESS_DB_PATH = "./learning_progress.db"
+    PROGRESS_FLUSH_BATCH = 256  # Buffered review updates per SQLite commit
+    PROGRESS_FLUSH_SECONDS = 2.0
\ No newline at end of file
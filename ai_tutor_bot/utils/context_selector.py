@@ -0,0 +1,83 @@
+import logging
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.text_processor import TextProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class ContextSelector:
+    """Builds the QA context from the retrieved sentences closest to the query.
+
+    Sentences are ranked by cosine similarity to the query embedding and packed
+    greedily into what one QA window leaves after the question, then put back in
+    reading order. The QA model then runs one forward pass per question instead
+    of one per window of the concatenated chunks.
+    """
+
+    def __init__(self, tokenizer: Any = None, max_seq_len: Optional[int] = None,
+                 tokenizer_loader: Optional[Callable[[], Any]] = None):
+        self._tokenizer = tokenizer
+        # Resolved on first selection, so the QA model is not loaded just to build the selector
+        self._tokenizer_loader = tokenizer_loader
+        self.max_seq_len = max_seq_len or Config.QA_MAX_SEQ_LEN
+
+    @property
+    def tokenizer(self) -> Any:
+        if self._tokenizer is None and self._tokenizer_loader is not None:
+            self._tokenizer = self._tokenizer_loader()
+            self._tokenizer_loader = None
+        return self._tokenizer
+
+    @staticmethod
+    def split(passages: Sequence[str]) -> List[Tuple[int, str]]:
+        """(passage index, sentence) pairs in reading order"""
+        return [(idx, sentence) for idx, passage in enumerate(passages)
+                for sentence in TextProcessor.split_sentences(passage or "")]
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        if self.tokenizer is None:
+            # Rough subword estimate when no tokenizer is available
+            return [int(len(text.split()) * 1.3) + 1 for text in texts]
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def budget(self, question: str) -> int:
+        """Context tokens that fit in one QA window next to the question"""
+        special = self.tokenizer.num_special_tokens_to_add(pair=True) if self.tokenizer is not None else 4
+        return self.max_seq_len - self.token_lengths([question])[0] - special
+
+    def select(self, question: str, query_embedding: Sequence[float],
+               sentences: List[Tuple[int, str]], embeddings: np.ndarray) -> str:
+        if not sentences:
+            return ""
+        budget = self.budget(question)
+        # One extra token per sentence covers the separator it is joined with
+        lengths = [length + 1 for length in self.token_lengths([sentence for _, sentence in sentences])]
+
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+        norms[norms == 0] = 1.0
+        scores = (matrix @ query) / norms
+
+        chosen = []
+        used = 0
+        for i in np.argsort(-scores, kind="stable"):
+            if used + lengths[i] <= budget:
+                chosen.append(int(i))
+                used += lengths[i]
+        if not chosen:
+            # Even the best sentence overflows the window; QA will stride over it
+            chosen = [int(np.argmax(scores))]
+        chosen.sort()
+
+        parts = []
+        previous = None
+        for i in chosen:
+            passage, sentence = sentences[i]
+            if previous is not None:
+                parts.append(" " if passage == previous else "\n")
+            parts.append(sentence)
+            previous = passage
+        return "".join(parts)
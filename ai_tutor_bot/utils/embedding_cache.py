@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by (model name, normalized text hash).
+
+    The memory tier is a bounded LRU. The disk tier is an append-only float32
+    (or float16) matrix that is memory-mapped for reads, plus a key file whose
+    line number is the row index, so it survives restarts without loading every
+    vector. Vectors are always returned as float32.
+
+    Row numbers are assigned by the process that appends, so only one process
+    may write a cache directory. Others open it read_only: they serve the rows
+    present when they opened it and keep new vectors in memory.
+    """
+
+    def __init__(self, model_name: str,
+                 cache_dir: Optional[str] = None,
+                 max_items: Optional[int] = None,
+                 dtype: Optional[str] = None,
+                 read_only: bool = False):
+        self.model_name = model_name
+        self.read_only = read_only
+        self.max_items = Config.EMBEDDING_CACHE_SIZE if max_items is None else max_items
+        # An existing cache keeps the dtype recorded in its meta.json
+        self.dtype = np.dtype(dtype or Config.EMBEDDING_CACHE_DTYPE)
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        cache_dir = Config.EMBEDDING_CACHE_DIR if cache_dir is None else cache_dir
+        self.dir = os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)) if cache_dir else None
+        self._rows: Dict[str, int] = {}
+        self._dim: Optional[int] = None
+        self._matrix: Optional[np.memmap] = None
+        if self.dir:
+            self._load_index()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def key(self, text: str) -> str:
+        payload = f"{self.model_name}\0{self.normalize(text)}".encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()
+
+    # Disk tier
+
+    def _paths(self):
+        return (os.path.join(self.dir, f"vectors.f{self.dtype.itemsize * 8}"),
+                os.path.join(self.dir, "keys.txt"),
+                os.path.join(self.dir, "meta.json"))
+
+    def _load_index(self):
+        vectors_path, keys_path, meta_path = self._paths()
+        if not os.path.exists(meta_path):
+            return
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self._dim = int(meta["dim"])
+            self.dtype = np.dtype(meta.get("dtype", "float32"))
+            vectors_path = self._paths()[0]
+            # Vectors are written before keys, so the smaller count is the consistent one
+            n_vectors = (os.path.getsize(vectors_path) // (self.dtype.itemsize * self._dim)
+                         if os.path.exists(vectors_path) else 0)
+            with open(keys_path) as f:
+                # A key line without its newline was cut off mid-write
+                keys = [line[:-1] for line in f if line.endswith("\n")][:n_vectors]
+            # Drop whatever a torn write left past that count, so appended rows and keys line up again.
+            # A reader leaves the files alone: the tail may be the writer's append in progress
+            if not self.read_only:
+                if n_vectors > len(keys):
+                    with open(vectors_path, "r+b") as f:
+                        f.truncate(len(keys) * self.dtype.itemsize * self._dim)
+                with open(keys_path, "r+") as f:
+                    f.seek(sum(len(key) + 1 for key in keys))
+                    f.truncate()
+            self._rows = {key: row for row, key in enumerate(keys)}
+            logger.info(f"Embedding cache for {self.model_name}: {len(self._rows)} vectors on disk")
+        except Exception as e:
+            logger.error(f"Failed to load embedding cache index: {e}")
+            self._rows = {}
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        if self._matrix is None or self._matrix.shape[0] <= row:
+            vectors_path = self._paths()[0]
+            self._matrix = np.memmap(vectors_path, dtype=self.dtype, mode="r",
+                                     shape=(len(self._rows), self._dim))
+        return np.array(self._matrix[row], dtype=np.float32)
+
+    def _disk_put(self, keys: List[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype)
+        if self._dim is None:
+            self._dim = vectors.shape[1]
+            os.makedirs(self.dir, exist_ok=True)
+            with open(self._paths()[2], "w") as f:
+                json.dump({"model": self.model_name, "dim": self._dim, "dtype": self.dtype.name}, f)
+        vectors_path, keys_path, _ = self._paths()
+        sizes = [os.path.getsize(path) if os.path.exists(path) else 0 for path in (vectors_path, keys_path)]
+        try:
+            with open(vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(keys_path, "a") as f:
+                f.write("".join(f"{key}\n" for key in keys))
+        except Exception:
+            # Roll both files back so row numbers keep matching key lines
+            for path, size in zip((vectors_path, keys_path), sizes):
+                if os.path.exists(path):
+                    os.truncate(path, size)
+            raise
+        for key in keys:
+            self._rows[key] = len(self._rows)
+
+    # Memory tier
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self.key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+            if self.dir:
+                vector = self._disk_get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def put_many(self, texts: List[str], vectors: np.ndarray, persist: bool = True):
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+            if persist and self.dir and not self.read_only:
+                new = [(i, key) for i, key in enumerate(keys) if key not in self._rows]
+                # Duplicate texts within one batch share a key; keep the first row
+                seen = set()
+                new = [(i, key) for i, key in new if not (key in seen or seen.add(key))]
+                if new:
+                    self._disk_put([key for _, key in new], vectors[[i for i, _ in new]])
+
+    def encode(self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray],
+               persist: bool = True) -> np.ndarray:
+        """Return embeddings for texts, calling encode_fn only for cache misses"""
+        found = [self.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, found) if vector is None))
+        if missing:
+            computed = np.asarray(encode_fn(missing), dtype=np.float32)
+            self.put_many(missing, computed, persist=persist)
+            by_text = dict(zip(missing, computed))
+            found = [by_text[text] if vector is None else vector for text, vector in zip(texts, found)]
+        if not found:
+            return np.zeros((0, self._dim or 0), dtype=np.float32)
+        return np.stack(found)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_items": len(self._memory),
+            "disk_items": len(self._rows),
+        }
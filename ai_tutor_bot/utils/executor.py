@@ -0,0 +1,149 @@
+import asyncio
+import functools
+import time
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorOverloaded(RuntimeError):
+    """Raised when the waiting queue is full and a new request is rejected"""
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_wait": self.total_wait / self.count if self.count else 0.0,
+            "max_wait": self.max_wait,
+            "avg_run": self.total_run / self.count if self.count else 0.0,
+        }
+
+
+class InferenceExecutor:
+    """Bounded pool that keeps blocking model and DB calls off the event loop"""
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None,
+                 max_queue: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 kind: str = "thread"):
+        self.max_workers = max_workers or Config.EXECUTOR_MAX_WORKERS
+        self.max_in_flight = max_in_flight or Config.EXECUTOR_MAX_IN_FLIGHT
+        self.max_queue = Config.EXECUTOR_MAX_QUEUE if max_queue is None else max_queue
+        self.timeout = Config.EXECUTOR_TIMEOUT if timeout is None else timeout
+        self.kind = kind
+
+        # Process pools only accept picklable callables, so model/DB calls use threads
+        if kind == "process":
+            self._pool: Executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="tutor-inference")
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._in_flight = 0
+        self._stats: Dict[str, StageStats] = {}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    def _stage(self, stage: str) -> StageStats:
+        if stage not in self._stats:
+            self._stats[stage] = StageStats()
+        return self._stats[stage]
+
+    async def run(self, stage: str, fn: Callable[..., Any], *args,
+                  timeout: Optional[float] = None, **kwargs) -> Any:
+        stats = self._stage(stage)
+        if self._waiting >= self.max_queue:
+            stats.errors += 1
+            raise ExecutorOverloaded(f"Inference queue full ({self._waiting} waiting) for stage '{stage}'")
+
+        enqueued = time.perf_counter()
+        self._waiting += 1
+        semaphore = self._get_semaphore()
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        started = {}
+
+        def _call():
+            started["at"] = time.perf_counter()
+            return fn(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+
+        def _release(_):
+            # The slot is held until the worker really finishes, even after a timeout
+            self._in_flight -= 1
+            semaphore.release()
+
+        limit = self.timeout if timeout is None else timeout
+        try:
+            if self.kind == "process":
+                # Start time is not observable inside another process; count submission instead
+                started["at"] = time.perf_counter()
+                work = self._pool.submit(functools.partial(fn, *args, **kwargs))
+            else:
+                work = self._pool.submit(_call)
+        except Exception:
+            self._in_flight -= 1
+            semaphore.release()
+            stats.errors += 1
+            raise
+        work.add_done_callback(
+            lambda f: None if loop.is_closed() else loop.call_soon_threadsafe(_release, f))
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(work), timeout=limit or None)
+            stats.count += 1
+            return result
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            logger.error(f"Stage '{stage}' timed out after {limit}s")
+            raise
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            finished = time.perf_counter()
+            start = started.get("at", finished)
+            wait = start - enqueued
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            stats.total_run += finished - start
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "stages": {name: s.as_dict() for name, s in self._stats.items()},
+        }
+
+    def reset_stats(self):
+        self._stats = {}
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
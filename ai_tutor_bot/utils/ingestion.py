@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.executor import InferenceExecutor
+
+logger = logging.getLogger(__name__)
+
+Document = Dict[str, str]
+DocumentSource = Union[Iterable[Document], AsyncIterable[Document]]
+
+_DONE = object()
+
+
+def iter_jsonl(path: str) -> Iterator[Document]:
+    """Yield documents from a JSONL file with "id", "text" and optional "source" fields"""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                doc = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping malformed line {line_no} in {path}: {e}")
+                continue
+            doc.setdefault("id", f"{os.path.basename(path)}:{line_no}")
+            doc.setdefault("source", os.path.basename(path))
+            yield doc
+
+
+def iter_text_dir(path: str, extensions: Tuple[str, ...] = (".txt", ".md")) -> Iterator[Document]:
+    """Yield one document per text file under a directory, keyed by relative path"""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(extensions):
+                continue
+            full_path = os.path.join(root, name)
+            try:
+                with open(full_path, encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError as e:
+                logger.warning(f"Skipping unreadable file {full_path}: {e}")
+                continue
+            yield {
+                "id": os.path.relpath(full_path, path).replace(os.sep, "/"),
+                "source": os.path.splitext(name)[0],
+                "text": text,
+            }
+
+
+def open_source(path: str) -> Iterator[Document]:
+    if os.path.isdir(path):
+        return iter_text_dir(path)
+    return iter_jsonl(path)
+
+
+def _take(iterator: Iterator[Document], n: int) -> List[Document]:
+    batch = []
+    for doc in iterator:
+        batch.append(doc)
+        if len(batch) >= n:
+            break
+    return batch
+
+
+class StreamingIngestor:
+    """Pipelined read -> chunk/metadata -> embed -> upsert ingestion with bounded queues.
+
+    Memory stays proportional to queue depth times batch size, not corpus size,
+    and upserts go to the vector DB in fixed-size batches.
+    """
+
+    def __init__(self, agent: Any,
+                 doc_batch_size: Optional[int] = None,
+                 upsert_batch_size: Optional[int] = None,
+                 queue_depth: Optional[int] = None,
+                 preprocess_workers: Optional[int] = None):
+        self.agent = agent
+        self.doc_batch_size = doc_batch_size or Config.INGEST_DOC_BATCH_SIZE
+        self.upsert_batch_size = upsert_batch_size or Config.UPSERT_BATCH_SIZE
+        self.queue_depth = queue_depth or Config.INGEST_QUEUE_DEPTH
+        self.preprocess_workers = Config.PREPROCESS_WORKERS if preprocess_workers is None else preprocess_workers
+        self._preprocess_pool: Optional[InferenceExecutor] = None
+        self.stats = {"documents": 0, "changed_documents": 0, "chunks": 0, "stale_deleted": 0, "failed_chunks": 0}
+        # Chunk ids each changed document no longer has, deleted once its new chunks are all stored
+        self._stale: Dict[str, List[str]] = {}
+        # Documents that lost a chunk to a failed embed or upsert in this run
+        self._failed_docs: Set[str] = set()
+        # Documents that had no chunks stored before this run
+        self._new_docs: Set[str] = set()
+
+    async def _read(self, source: DocumentSource, out: asyncio.Queue):
+        executor = self.agent.executor
+        if hasattr(source, "__aiter__"):
+            batch = []
+            async for doc in source:
+                batch.append(doc)
+                if len(batch) >= self.doc_batch_size:
+                    await out.put(batch)
+                    batch = []
+            if batch:
+                await out.put(batch)
+        else:
+            iterator = iter(source)
+            while True:
+                # File reads happen off the event loop
+                batch = await executor.run("read", _take, iterator, self.doc_batch_size, timeout=0)
+                if not batch:
+                    break
+                await out.put(batch)
+        await out.put(_DONE)
+
+    async def _chunk(self, inp: asyncio.Queue, out: asyncio.Queue):
+        pending = []
+        while True:
+            docs = await inp.get()
+            if docs is _DONE:
+                break
+            self.stats["documents"] += len(docs)
+            changed, previous = await self.agent.select_changed_documents(docs)
+            if not changed:
+                continue
+            self.stats["changed_documents"] += len(changed)
+
+            by_doc: Dict[str, List[Tuple[str, str, Dict]]] = {}
+            for record in await self._preprocess(changed):
+                by_doc.setdefault(record[2].get("doc_id", ""), []).append(record)
+            for doc_id, records in by_doc.items():
+                if doc_id not in previous:
+                    self._new_docs.add(doc_id)
+                fresh_ids = {vector_id for vector_id, _, _ in records}
+                self._stale[doc_id] = [vector_id for vector_id in previous.get(doc_id, ()) if vector_id not in fresh_ids]
+                # The first chunk carries the fingerprint; writing it last means a document only
+                # looks up to date once every other chunk of it is stored
+                pending.extend(records[1:] + records[:1])
+
+            # Documents that no longer produce any chunks have nothing left to store
+            emptied = [doc_id for doc_id in previous if doc_id not in by_doc]
+            if emptied:
+                await self._delete_stale([vector_id for doc_id in emptied for vector_id in previous[doc_id]])
+                self.agent.invalidate_documents(emptied)
+
+            while len(pending) >= self.upsert_batch_size:
+                await out.put(pending[:self.upsert_batch_size])
+                pending = pending[self.upsert_batch_size:]
+        if pending:
+            await out.put(pending)
+        await out.put(_DONE)
+
+    async def _preprocess(self, changed: List[Tuple[Document, str]]) -> List[Tuple[str, str, Dict]]:
+        if self._preprocess_pool is None:
+            return await self.agent.executor.run("chunk", _chunk_documents, self.agent.chunk_document, changed, timeout=0)
+
+        # Documents fan out to worker processes in slices to amortize pickling overhead
+        size = Config.PREPROCESS_TASK_SIZE
+        parts = await asyncio.gather(*[
+            self._preprocess_pool.run("chunk", _chunk_documents, self.agent.chunk_document, changed[i:i + size],
+                                     timeout=0)
+            for i in range(0, len(changed), size)
+        ])
+        return [record for part in parts for record in part]
+
+    async def _embed(self, inp: asyncio.Queue, out: asyncio.Queue):
+        while True:
+            records = await inp.get()
+            if records is _DONE:
+                break
+            try:
+                # Ingestion stages are not timed: a batch of long chunks on a CPU can outlast
+                # EXECUTOR_TIMEOUT, and the worker would keep its slot after the timeout anyway
+                embeddings = await self.agent.executor.run(
+                    "embed", self.agent._encode_chunks, [chunk for _, chunk, _ in records], timeout=0)
+            except Exception as e:
+                # Failed documents keep their old fingerprint and are retried next run
+                logger.error(f"Embedding failed for {len(records)} chunks: {e}")
+                self.stats["failed_chunks"] += len(records)
+                self._failed_docs.update(metadata.get("doc_id", "") for _, _, metadata in records)
+                continue
+            # Vectors stay one contiguous float32 matrix all the way to the backend
+            await out.put(([vector_id for vector_id, _, _ in records],
+                           np.ascontiguousarray(embeddings, dtype=np.float32),
+                           [metadata for _, _, metadata in records],
+                           [chunk for _, chunk, _ in records]))
+        await out.put(_DONE)
+
+    async def _upsert(self, inp: asyncio.Queue):
+        while True:
+            batch = await inp.get()
+            if batch is _DONE:
+                break
+            ids, embeddings, metadatas, texts = batch
+            # Documents that already lost a chunk keep their old fingerprint, so the next run retries them
+            keep = [i for i, metadata in enumerate(metadatas)
+                    if not (metadata.get("chunk_id") == "0" and metadata.get("doc_id", "") in self._failed_docs)]
+            if len(keep) < len(ids):
+                self.stats["failed_chunks"] += len(ids) - len(keep)
+                ids, embeddings = [ids[i] for i in keep], embeddings[keep]
+                metadatas, texts = [metadatas[i] for i in keep], [texts[i] for i in keep]
+            if not ids:
+                continue
+
+            doc_ids = {metadata.get("doc_id", "") for metadata in metadatas}
+            if not await self.agent.db_manager.async_upsert(ids, embeddings, metadatas, texts):
+                self.stats["failed_chunks"] += len(ids)
+                self._failed_docs.update(doc_ids)
+                continue
+            self.stats["chunks"] += len(ids)
+
+            completed = [metadata.get("doc_id", "") for metadata in metadatas if metadata.get("chunk_id") == "0"]
+            await self._delete_stale([vector_id for doc_id in completed for vector_id in self._stale.pop(doc_id, ())])
+            # Cached answers built from the old version of these documents are now stale, and
+            # chunks of a new document can change the answer to any cached question
+            self.agent.invalidate_documents(None if doc_ids & self._new_docs else doc_ids)
+
+    async def _delete_stale(self, ids: List[str]):
+        if ids:
+            await self.agent.db_manager.async_delete(ids)
+            self.stats["stale_deleted"] += len(ids)
+
+    async def run(self, source: DocumentSource) -> Dict[str, float]:
+        start = time.perf_counter()
+        if self.preprocess_workers > 1:
+            self._preprocess_pool = InferenceExecutor(
+                max_workers=self.preprocess_workers,
+                max_in_flight=self.preprocess_workers * 2,
+                kind="process"
+            )
+        docs_q = asyncio.Queue(maxsize=self.queue_depth)
+        chunks_q = asyncio.Queue(maxsize=self.queue_depth)
+        vectors_q = asyncio.Queue(maxsize=self.queue_depth)
+        tasks = [
+            asyncio.ensure_future(self._read(source, docs_q)),
+            asyncio.ensure_future(self._chunk(docs_q, chunks_q)),
+            asyncio.ensure_future(self._embed(chunks_q, vectors_q)),
+            asyncio.ensure_future(self._upsert(vectors_q)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+            await self.agent.db_manager.async_flush()
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            if self._preprocess_pool is not None:
+                self._preprocess_pool.shutdown()
+                self._preprocess_pool = None
+
+        elapsed = time.perf_counter() - start
+        report = dict(self.stats)
+        report["seconds"] = elapsed
+        report["docs_per_sec"] = self.stats["documents"] / elapsed if elapsed else 0.0
+        report["chunks_per_sec"] = self.stats["chunks"] / elapsed if elapsed else 0.0
+        if self.stats["chunks"]:
+            logger.info(f"Ingested {self.stats['chunks']} vectors from {self.stats['changed_documents']} "
+                        f"changed documents ({report['docs_per_sec']:.1f} docs/s, "
+                        f"{report['chunks_per_sec']:.1f} chunks/s)")
+        elif not self.stats["changed_documents"]:
+            logger.info("No changed documents to ingest")
+        else:
+            logger.warning("No vectors to ingest")
+        return report
+
+
+def _chunk_documents(chunk_fn, changed: List[Tuple[Document, str]]) -> List[Tuple[str, str, Dict]]:
+    records = []
+    for doc, fingerprint in changed:
+        records.extend(chunk_fn(doc, fingerprint))
+    return records
@@ -0,0 +1,174 @@
+import time
+import bisect
+import threading
+import contextlib
+import contextvars
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = contextlib.nullcontext()
+
+# Spans of the request being handled in this task, when the caller asked for a trace
+_trace: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("trace", default=None)
+
+
+class _StageTimer:
+    __slots__ = ("count", "errors", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(_BUCKETS) + 1)
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.observe(self.name, elapsed, error=exc_type is not None)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((self.name, elapsed))
+        return False
+
+
+class Metrics:
+    """Process-wide stage timers and counters, exported as Prometheus text or JSON.
+
+    Spans use the monotonic perf_counter clock. When metrics are disabled and
+    no per-request trace is active, span() returns a shared no-op context
+    manager and inc() returns immediately.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, prefix: str = "tutor"):
+        self._enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _StageTimer] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        # Follows Config.METRICS_ENABLED unless set explicitly
+        return Config.METRICS_ENABLED if self._enabled is None else self._enabled
+
+    @enabled.setter
+    def enabled(self, value: Optional[bool]):
+        self._enabled = value
+
+    def span(self, name: str):
+        if not self.enabled and _trace.get() is None:
+            return _NOOP
+        return _Span(self, name)
+
+    def observe(self, name: str, seconds: float, error: bool = False):
+        if not self.enabled:
+            return
+        with self._lock:
+            timer = self._stages.get(name)
+            if timer is None:
+                timer = self._stages[name] = _StageTimer()
+            timer.count += 1
+            timer.errors += error
+            timer.total += seconds
+            timer.max = max(timer.max, seconds)
+            timer.buckets[bisect.bisect_left(_BUCKETS, seconds)] += 1
+
+    def inc(self, name: str, value: float = 1.0, **labels: str):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    # Per-request traces
+
+    @staticmethod
+    def start_trace() -> contextvars.Token:
+        return _trace.set([])
+
+    @staticmethod
+    def end_trace(token: contextvars.Token) -> List[Dict[str, Any]]:
+        spans = _trace.get() or []
+        _trace.reset(token)
+        return [{"stage": name, "ms": round(seconds * 1000, 3)} for name, seconds in spans]
+
+    # Export
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                name: {
+                    "count": t.count,
+                    "errors": t.errors,
+                    "total_s": t.total,
+                    "mean_ms": t.total / t.count * 1000 if t.count else 0.0,
+                    "max_ms": t.max * 1000,
+                }
+                for name, t in self._stages.items()
+            }
+            counters = {_series(name, labels): value for (name, labels), value in self._counters.items()}
+        return {"stages": stages, "counters": counters}
+
+    def prometheus(self, labels: Optional[Dict[str, str]] = None) -> str:
+        """Text exposition; labels (e.g. a worker id) are added to every series"""
+        const = tuple(sorted((labels or {}).items()))
+        extra = "".join(f'{k}="{_escape(v)}",' for k, v in const)
+        stage_metric = f"{self.prefix}_stage_seconds"
+        lines = [f"# HELP {stage_metric} Time spent per request stage",
+                 f"# TYPE {stage_metric} histogram"]
+        with self._lock:
+            for name, t in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, count in zip(_BUCKETS + (float("inf"),), t.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{stage_metric}_bucket{{{extra}stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{stage_metric}_sum{{{extra}stage="{name}"}} {t.total}')
+                lines.append(f'{stage_metric}_count{{{extra}stage="{name}"}} {t.count}')
+            errors_metric = f"{self.prefix}_stage_errors_total"
+            lines += [f"# TYPE {errors_metric} counter"]
+            lines += [f'{errors_metric}{{{extra}stage="{name}"}} {t.errors}' for name, t in sorted(self._stages.items())]
+
+            by_name: Dict[str, List[str]] = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                by_name.setdefault(name, []).append(f"{_series(f'{self.prefix}_{name}', const + labels)} {value}")
+        for name, series in by_name.items():
+            lines.append(f"# TYPE {self.prefix}_{name} counter")
+            lines.extend(series)
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _series(name: str, labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+metrics = Metrics()
@@ -0,0 +1,117 @@
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve_device() -> str:
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _load_embedding_model() -> Any:
+    if Config.INFERENCE_BACKEND == "onnx":
+        from ai_tutor_bot.utils.onnx_models import load_embedding_model
+        return load_embedding_model()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(Config.EMBEDDING_MODEL, device=ModelRegistry.device())
+
+
+def _load_qa_pipeline() -> Any:
+    if Config.INFERENCE_BACKEND == "onnx":
+        from ai_tutor_bot.utils.onnx_models import load_qa_pipeline
+        return load_qa_pipeline()
+    from transformers import pipeline
+    return pipeline(
+        'question-answering',
+        model=Config.QA_MODEL,
+        tokenizer=Config.QA_MODEL,
+        device=0 if ModelRegistry.device() == "cuda" else -1
+    )
+
+
+def embedding_model_id() -> str:
+    """Names the embedding weights in use, so cached vectors from other backends are not mixed in"""
+    if Config.INFERENCE_BACKEND == "onnx":
+        return f"{Config.EMBEDDING_MODEL}@onnx-{Config.ONNX_QUANTIZATION or 'fp32'}"
+    return Config.EMBEDDING_MODEL
+
+
+def _load_chunk_tokenizer() -> Any:
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(Config.EMBEDDING_MODEL, use_fast=True)
+
+
+class ModelRegistry:
+    """Process-wide, lazily loaded models shared by the agent and the vector DB"""
+
+    _loaders: Dict[str, Callable[[], Any]] = {
+        "embedding": _load_embedding_model,
+        "qa": _load_qa_pipeline,
+        "chunk_tokenizer": _load_chunk_tokenizer,
+    }
+    _models: Dict[str, Any] = {}
+    _load_times: Dict[str, float] = {}
+    _locks: Dict[str, threading.Lock] = {}
+    _registry_lock = threading.Lock()
+
+    @classmethod
+    def device(cls) -> str:
+        if Config.DEVICE is None:
+            Config.DEVICE = _resolve_device()
+            logger.info(f"Device set to use {Config.DEVICE}")
+        return Config.DEVICE
+
+    @classmethod
+    def register_loader(cls, name: str, loader: Callable[[], Any]):
+        with cls._registry_lock:
+            cls._loaders[name] = loader
+            cls._models.pop(name, None)
+
+    @classmethod
+    def set(cls, name: str, model: Any):
+        """Install an already constructed model (e.g. a stub or a preloaded instance)"""
+        with cls._registry_lock:
+            cls._models[name] = model
+            cls._load_times[name] = 0.0
+
+    @classmethod
+    def get(cls, name: str) -> Any:
+        model = cls._models.get(name)
+        if model is not None:
+            return model
+
+        with cls._registry_lock:
+            if name not in cls._loaders and name not in cls._models:
+                raise KeyError(f"No model registered under '{name}'")
+            lock = cls._locks.setdefault(name, threading.Lock())
+
+        # Per-model lock so loading the QA model does not block embedding users
+        with lock:
+            model = cls._models.get(name)
+            if model is None:
+                start = time.perf_counter()
+                model = cls._loaders[name]()
+                elapsed = time.perf_counter() - start
+                cls._models[name] = model
+                cls._load_times[name] = elapsed
+                logger.info(f"Loaded model '{name}' in {elapsed:.2f}s")
+        return model
+
+    @classmethod
+    def is_loaded(cls, name: str) -> bool:
+        return name in cls._models
+
+    @classmethod
+    def startup_report(cls) -> Dict[str, float]:
+        """Seconds spent loading each model, in load order"""
+        return dict(cls._load_times)
+
+    @classmethod
+    def clear(cls):
+        with cls._registry_lock:
+            cls._models.clear()
+            cls._load_times.clear()
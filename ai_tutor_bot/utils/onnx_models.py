@@ -0,0 +1,87 @@
+import os
+import logging
+from typing import Any, Optional, Tuple
+from ai_tutor_bot.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# ONNX Runtime, optimum and the sentence-transformers ONNX backend are optional
+# and only imported when Config.INFERENCE_BACKEND is "onnx". Quantized exports are
+# checked against the PyTorch models with benchmarks/bench_onnx.py, which fails
+# below its parity bars.
+
+
+def _artifact_dir(model_name: str) -> str:
+    return os.path.join(Config.ONNX_CACHE_DIR, model_name.replace("/", "--"))
+
+
+def session_options() -> Any:
+    import onnxruntime
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if Config.ONNX_INTRA_OP_THREADS:
+        options.intra_op_num_threads = Config.ONNX_INTRA_OP_THREADS
+    return options
+
+
+def export_embedding_model(model_name: Optional[str] = None) -> Tuple[str, str]:
+    """Export (and quantize) the sentence encoder once; returns (directory, onnx file)"""
+    from sentence_transformers import SentenceTransformer
+    model_name = model_name or Config.EMBEDDING_MODEL
+    directory = _artifact_dir(model_name)
+    quantization = Config.ONNX_QUANTIZATION
+    file_name = f"onnx/model_qint8_{quantization}.onnx" if quantization else "onnx/model.onnx"
+    if os.path.exists(os.path.join(directory, file_name)):
+        return directory, file_name
+
+    logger.info(f"Exporting {model_name} to ONNX in {directory}")
+    model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+    model.save(directory)
+    if quantization:
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        export_dynamic_quantized_onnx_model(model, quantization, directory)
+    return directory, file_name
+
+
+def export_qa_model(model_name: Optional[str] = None) -> Tuple[str, str]:
+    """Export (and quantize) the extractive QA model once; returns (directory, onnx file)"""
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForQuestionAnswering, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    model_name = model_name or Config.QA_MODEL
+    directory = _artifact_dir(model_name)
+    quantization = Config.ONNX_QUANTIZATION
+    file_name = "model_quantized.onnx" if quantization else "model.onnx"
+    if os.path.exists(os.path.join(directory, file_name)):
+        return directory, file_name
+
+    logger.info(f"Exporting {model_name} to ONNX in {directory}")
+    model = ORTModelForQuestionAnswering.from_pretrained(model_name, export=True)
+    model.save_pretrained(directory)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(directory)
+    if quantization:
+        # Dynamic quantization: int8 weights, activations quantized per batch, no calibration data
+        config = getattr(AutoQuantizationConfig, quantization)(is_static=False, per_channel=False)
+        ORTQuantizer.from_pretrained(directory, file_name="model.onnx").quantize(
+            save_dir=directory, quantization_config=config)
+    return directory, file_name
+
+
+def load_embedding_model() -> Any:
+    from sentence_transformers import SentenceTransformer
+    directory, file_name = export_embedding_model()
+    # Same encode() API as the PyTorch model, pooling and normalization included
+    return SentenceTransformer(directory, device="cpu", backend="onnx", model_kwargs={
+        "file_name": file_name,
+        "provider": "CPUExecutionProvider",
+        "session_options": session_options(),
+    })
+
+
+def load_qa_pipeline() -> Any:
+    from transformers import AutoTokenizer, pipeline
+    from optimum.onnxruntime import ORTModelForQuestionAnswering
+    directory, file_name = export_qa_model()
+    model = ORTModelForQuestionAnswering.from_pretrained(
+        directory, file_name=file_name, provider="CPUExecutionProvider", session_options=session_options())
+    return pipeline('question-answering', model=model, tokenizer=AutoTokenizer.from_pretrained(directory), device=-1)
@@ -0,0 +1,146 @@
+import time
+import logging
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.db.concept_index import normalize_concept
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticResponseCache:
+    """Answers for recent questions, matched by cosine similarity of query embeddings.
+
+    Query vectors live in one preallocated, L2-normalized float32 matrix so a
+    lookup is a single matrix-vector product. Entries expire after a TTL and the
+    least recently used slot is recycled when the matrix is full.
+
+    Every entry is stored under scopes (see scopes_for): the student who asked
+    and the exact concept filter its retrieval ran under. A lookup only sees
+    entries sharing one of its scopes. A student's repeat questions hit their
+    own answers even as their concept history moves. Another student only gets
+    an answer retrieved under the identical filter, i.e. the same candidate chunks.
+    """
+
+    def __init__(self, capacity: Optional[int] = None,
+                 ttl: Optional[float] = None,
+                 threshold: Optional[float] = None):
+        self.capacity = capacity or Config.SEMANTIC_CACHE_SIZE
+        self.ttl = Config.SEMANTIC_CACHE_TTL if ttl is None else ttl
+        self.threshold = Config.SIMILARITY_THRESHOLD if threshold is None else threshold
+        self._matrix: Optional[np.ndarray] = None
+        self._valid = np.zeros(self.capacity, dtype=bool)
+        self._expires = np.zeros(self.capacity, dtype=np.float64)
+        self._last_used = np.zeros(self.capacity, dtype=np.float64)
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._slots_by_doc: Dict[str, Set[int]] = {}
+        self._slots_by_scope: Dict[Hashable, Set[int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def scopes_for(user_id: str, concepts: Optional[Iterable[str]]) -> Tuple[Hashable, Hashable]:
+        """The asking user's scope and the scope of their concept filter; no concepts means unfiltered"""
+        return ("user", user_id), ("filter", frozenset(filter(None, map(normalize_concept, concepts or ()))))
+
+    def _scoped_slots(self, scopes: Iterable[Hashable]) -> Set[int]:
+        slots = set()
+        for scope in scopes:
+            slots.update(self._slots_by_scope.get(scope, ()))
+        return slots
+
+    def lookup(self, query_embedding: np.ndarray, scopes: Iterable[Hashable] = (None,)) -> Optional[Dict[str, Any]]:
+        scopes = tuple(scopes)
+        if self._matrix is None or not self._scoped_slots(scopes):
+            self.misses += 1
+            return None
+
+        now = time.monotonic()
+        expired = self._valid & (self._expires <= now)
+        if expired.any():
+            for slot in np.flatnonzero(expired):
+                self._drop(int(slot))
+
+        slots = np.fromiter(self._scoped_slots(scopes), dtype=np.intp)
+        if not len(slots):
+            self.misses += 1
+            return None
+        scores = self._matrix[slots] @ self._normalize(query_embedding)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        slot = int(slots[best])
+        self.hits += 1
+        self._last_used[slot] = now
+        entry = self._entries[slot]
+        return {**entry, "similarity": float(scores[best])}
+
+    def store(self, query_embedding: np.ndarray, response: Dict[str, Any], doc_ids: Iterable[str],
+              scopes: Iterable[Hashable] = (None,)):
+        vector = self._normalize(query_embedding)
+        if self._matrix is None:
+            self._matrix = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+
+        free = np.flatnonzero(~self._valid)
+        if len(free):
+            slot = int(free[0])
+        else:
+            slot = int(np.argmin(self._last_used))
+            self._drop(slot)
+
+        now = time.monotonic()
+        doc_ids = set(doc_ids)
+        scopes = tuple(scopes)
+        self._matrix[slot] = vector
+        self._valid[slot] = True
+        self._expires[slot] = now + self.ttl if self.ttl else np.inf
+        self._last_used[slot] = now
+        self._entries[slot] = {"response": response, "doc_ids": doc_ids, "scopes": scopes}
+        for doc_id in doc_ids:
+            self._slots_by_doc.setdefault(doc_id, set()).add(slot)
+        for scope in scopes:
+            self._slots_by_scope.setdefault(scope, set()).add(slot)
+
+    def _drop(self, slot: int):
+        entry = self._entries[slot]
+        if entry is not None:
+            for doc_id in entry["doc_ids"]:
+                slots = self._slots_by_doc.get(doc_id)
+                if slots is not None:
+                    slots.discard(slot)
+                    if not slots:
+                        del self._slots_by_doc[doc_id]
+            for scope in entry["scopes"]:
+                slots = self._slots_by_scope.get(scope)
+                if slots is not None:
+                    slots.discard(slot)
+                    if not slots:
+                        del self._slots_by_scope[scope]
+        self._entries[slot] = None
+        self._valid[slot] = False
+
+    def invalidate_documents(self, doc_ids: Iterable[str]) -> int:
+        """Forget every answer that was built from any of these documents"""
+        slots = set()
+        for doc_id in doc_ids:
+            slots.update(self._slots_by_doc.get(doc_id, ()))
+        for slot in slots:
+            self._drop(slot)
+        if slots:
+            logger.info(f"Invalidated {len(slots)} cached answers after re-ingestion")
+        return len(slots)
+
+    def clear(self):
+        for slot in np.flatnonzero(self._valid):
+            self._drop(int(slot))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": int(self._valid.sum())}
@@ -1,91 +1,163 @@
 import re
 import string
+import hashlib
 import logging
-from typing import List, Dict
+from collections import Counter, deque
+from typing import Any, List, Dict
 
 logger = logging.getLogger(__name__)
 
+# Split on sentence boundaries, preserving mathematical expressions
+_SENTENCE_SPLIT = re.compile(r'((?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|!)\s|\n\n)')
+
+# Subject keywords in priority order, each subject compiled to one alternation.
+# Matching runs on lowercased text, as the keyword scan always has.
+_SUBJECT_KEYWORDS = {
+    "math": ["equation", "theorem", "calculate", "solve", "derivative", "integral"],
+    "physics": ["force", "energy", "velocity", "quantum", "electron"],
+    "chemistry": ["atom", "molecule", "reaction", "bond", "pH"],
+    "biology": ["cell", "dna", "protein", "photosynthesis", "gene"]
+}
+_SUBJECT_PATTERNS = [
+    (subject, re.compile("|".join(re.escape(k) for k in keywords)))
+    for subject, keywords in _SUBJECT_KEYWORDS.items()
+]
+
+# Part of every document fingerprint; bump it whenever extract_metadata_batch output
+# changes, so stored chunks are re-extracted instead of keeping the old concepts
+METADATA_EXTRACTOR_VERSION = 2
+
+_CONCEPT_PATTERNS = [
+    # Mathematical expressions. The lookbehind only skips starts inside a word,
+    # which could never be the leftmost match, so results are unchanged.
+    re.compile(r'(?<![a-zA-Z0-9_])[a-zA-Z0-9_]+[\s]*[=+\-*/^][\s]*[a-zA-Z0-9_]+'),
+    # Theorem names
+    re.compile(r'[A-Z][a-z]+(?:\'s)? [A-Z][a-z]+ (?:Theorem|Law|Identity)'),
+    # Important terms
+    re.compile(r'\b[A-Z][a-z]+\b(?:\s+[A-Z][a-z]+)*'),
+]
+
+
 class TextProcessor:
     @staticmethod
-    def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
-        """Robust text chunking that preserves mathematical expressions"""
-        if not text or not isinstance(text, str):
-            return []
-            
-        # Split on sentence boundaries, preserving mathematical expressions
-        sentence_endings = r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|!)\s'
-        sentences = re.split(f'({sentence_endings}|\\n\\n)', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
+    def split_sentences(text: str) -> List[str]:
+        sentences = _SENTENCE_SPLIT.split(text)
+        return [s for s in (s.strip() for s in sentences) if s]
+
+    @staticmethod
+    def pack_sentences(sentences: List[str], lengths: List[int],
+                       chunk_size: int, chunk_overlap: int, strict: bool = False) -> List[str]:
+        """Greedily pack sentences into chunks of about chunk_size length units.
+
+        With strict=True the overlap is taken from the end of the previous chunk
+        and only as far as it fits, so no chunk exceeds chunk_size (given every
+        sentence does not).
+        """
         chunks = []
-        current_chunk = []
+        current_chunk = deque()  # (sentence, length) pairs, so lengths are never recomputed
         current_length = 0
 
-        for sentence in sentences:
-            words = sentence.split()
-            sentence_length = len(words)
-            
+        for sentence, sentence_length in zip(sentences, lengths):
             if current_length + sentence_length <= chunk_size or not current_chunk:
-                current_chunk.append(sentence)
+                current_chunk.append((sentence, sentence_length))
                 current_length += sentence_length
             else:
-                chunks.append(" ".join(current_chunk))
-                overlap = []
+                chunks.append(" ".join(s for s, _ in current_chunk))
+                overlap = deque()
                 overlap_length = 0
                 while current_chunk and overlap_length < chunk_overlap:
-                    popped = current_chunk.pop(0)
-                    popped_words = popped.split()
-                    overlap.append(popped)
-                    overlap_length += len(popped_words)
-                current_chunk = overlap + [sentence]
+                    if strict:
+                        if overlap_length + current_chunk[-1][1] + sentence_length > chunk_size:
+                            break
+                        popped = current_chunk.pop()
+                        overlap.appendleft(popped)
+                    else:
+                        popped = current_chunk.popleft()
+                        overlap.append(popped)
+                    overlap_length += popped[1]
+                overlap.append((sentence, sentence_length))
+                current_chunk = overlap
                 current_length = overlap_length + sentence_length
         
         if current_chunk:
-            chunks.append(" ".join(current_chunk))
+            chunks.append(" ".join(s for s, _ in current_chunk))
         
         return chunks
 
     @staticmethod
-    def extract_metadata(text: str) -> Dict[str, str]:
-        metadata = {}
-        try:
-            # Subject detection
-            subjects = {
-                "math": ["equation", "theorem", "calculate", "solve", "derivative", "integral"],
-                "physics": ["force", "energy", "velocity", "quantum", "electron"],
-                "chemistry": ["atom", "molecule", "reaction", "bond", "pH"],
-                "biology": ["cell", "dna", "protein", "photosynthesis", "gene"]
-            }
-            
-            # Detect subject
-            subject = "general"
-            for sub, keywords in subjects.items():
-                if any(keyword in text.lower() for keyword in keywords):
-                    subject = sub
-                    break
-                    
-            metadata['subject'] = subject
-            
-            # Extract key terms and formulas
-            concepts = []
-            # Capture mathematical expressions
-            formulas = re.findall(r'[a-zA-Z0-9_]+[\s]*[=+\-*/^][\s]*[a-zA-Z0-9_]+', text)
-            concepts.extend(formulas)
-            
-            # Capture theorem names
-            theorems = re.findall(r'[A-Z][a-z]+(\'s)? [A-Z][a-z]+ (Theorem|Law|Identity)', text)
-            concepts.extend([t[0] for t in theorems])
-            
-            # Capture important terms
-            terms = re.findall(r'\b[A-Z][a-z]+\b(?:\s+[A-Z][a-z]+)*', text)
-            concepts.extend(terms)
-            
-            # Filter and limit concepts
-            if concepts:
-                unique_concepts = list(set(concepts))[:5]
-                metadata['concepts'] = ", ".join(unique_concepts)
-            
-        except Exception as e:
-            logger.error(f"Metadata extraction failed: {e}")
+    def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+        """Robust text chunking that preserves mathematical expressions"""
+        if not text or not isinstance(text, str):
+            return []
             
-        return metadata
\ No newline at end of file
+        sentences = TextProcessor.split_sentences(text)
+        lengths = [len(s.split()) for s in sentences]
+        return TextProcessor.pack_sentences(sentences, lengths, chunk_size, chunk_overlap)
+
+    @staticmethod
+    def chunk_text_by_tokens(text: str, tokenizer: Any, max_tokens: int, overlap_tokens: int) -> List[str]:
+        """Chunk by real model tokens so no chunk exceeds the encoder/QA window"""
+        if not text or not isinstance(text, str):
+            return []
+
+        sentences = TextProcessor.split_sentences(text)
+        if not sentences:
+            return []
+
+        # One batched call for the whole document; fast tokenizers also return offsets
+        encoded = tokenizer(sentences, add_special_tokens=False, return_offsets_mapping=True)
+        pieces = []
+        lengths = []
+        for sentence, offsets in zip(sentences, encoded["offset_mapping"]):
+            if len(offsets) <= max_tokens:
+                pieces.append(sentence)
+                lengths.append(len(offsets))
+                continue
+            # A single sentence longer than the budget is cut at token boundaries
+            for start in range(0, len(offsets), max_tokens):
+                window = offsets[start:start + max_tokens]
+                piece = sentence[window[0][0]:window[-1][1]].strip()
+                if piece:
+                    pieces.append(piece)
+                    lengths.append(len(window))
+
+        return TextProcessor.pack_sentences(pieces, lengths, max_tokens, overlap_tokens, strict=True)
+
+    @staticmethod
+    def document_fingerprint(text: str, *settings) -> str:
+        """Content hash of a document plus the settings that shape its chunks"""
+        payload = "\0".join([text] + [str(s) for s in settings]).encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()
+
+    @staticmethod
+    def extract_metadata(text: str) -> Dict[str, str]:
+        return TextProcessor.extract_metadata_batch([text])[0]
+
+    @staticmethod
+    def extract_metadata_batch(chunks: List[str]) -> List[Dict[str, str]]:
+        """Subject and top concepts for many chunks using the precompiled matchers"""
+        results = []
+        for text in chunks:
+            metadata = {}
+            try:
+                # Detect subject: first subject (in priority order) with any keyword in the text
+                lowered = text.lower()
+                subject = "general"
+                for sub, pattern in _SUBJECT_PATTERNS:
+                    if pattern.search(lowered):
+                        subject = sub
+                        break
+                metadata['subject'] = subject
+
+                # Formulas, theorem names and capitalized terms, ranked by frequency.
+                # Counter keeps first-seen order, so ties resolve deterministically.
+                counts = Counter()
+                for pattern in _CONCEPT_PATTERNS:
+                    counts.update(pattern.findall(text))
+
+                if counts:
+                    metadata['concepts'] = ", ".join(c for c, _ in counts.most_common(5))
+            except Exception as e:
+                logger.error(f"Metadata extraction failed: {e}")
+            results.append(metadata)
+        return results
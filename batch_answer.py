@@ -0,0 +1,51 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+from agents.tutor_agent import TutorAgent
+from ai_tutor_bot.utils.config import Config
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions in batches, e.g. a question bank or a grading run")
+    parser.add_argument("path", help="JSONL file, one {\"user_id\", \"query\"} object per line")
+    parser.add_argument("--output", help="JSONL file for the responses (default: stdout), written as they complete")
+    parser.add_argument("--batch-size", type=int, default=Config.ANSWER_BATCH_SIZE,
+                        help="Questions embedded and retrieved together")
+    parser.add_argument("--default-user", default="batch", help="user_id for lines that have none")
+    return parser.parse_args(argv)
+
+
+def read_pairs(path: str, default_user: str):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                yield item.get("user_id") or default_user, item.get("query", item.get("question"))
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    tutor = TutorAgent()
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    answered = 0
+    try:
+        async for response in tutor.answer_batch(read_pairs(args.path, args.default_user), args.batch_size):
+            out.write(json.dumps(response) + "\n")
+            answered += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        tutor.learning_system.store.close()
+    elapsed = time.perf_counter() - start
+    report = {"questions": answered, "seconds": elapsed, "questions_per_sec": answered / elapsed if elapsed else 0.0}
+    print(json.dumps(report, indent=2), file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1:]))
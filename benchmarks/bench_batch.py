@@ -0,0 +1,97 @@
+"""Questions/sec of TutorAgent.answer_batch against concurrent handle_query calls.
+
+Ingests a synthetic corpus, then answers the same question set once through
+handle_query at --concurrency and once through answer_batch per --batch-sizes
+value, with the semantic answer cache off so every question does the full work:
+
+    python -m benchmarks.bench_batch --questions 1000 --batch-sizes 16,64,256
+    python -m benchmarks.bench_batch --models local --backend chroma
+"""
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from ai_tutor_bot.utils.config import Config
+from benchmarks.workload import synthetic_corpus, synthetic_queries, install_stub_models
+from benchmarks.bench_e2e import isolate_storage, latency_summary, peak_rss_mb
+
+
+async def run(args) -> dict:
+    from agents.tutor_agent import TutorAgent
+
+    agent = TutorAgent()
+    await agent.ingest_documents(synthetic_corpus(args.docs, args.sentences, args.seed))
+    pairs = [(item["user_id"], item["query"]) for item in synthetic_queries(args.questions, args.users, args.seed)]
+    results = []
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(user_id, query):
+        async with semaphore:
+            return await agent.handle_query(user_id, query)
+
+    agent.executor.reset_stats()
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(one(user_id, query) for user_id, query in pairs))
+    elapsed = time.perf_counter() - start
+    results.append({"mode": f"handle_query x{args.concurrency}", "seconds": elapsed,
+                    "questions_per_sec": len(pairs) / elapsed,
+                    "latency": latency_summary([r["latency"] for r in responses]),
+                    "executor_calls": {k: v["count"] for k, v in agent.executor.stats()["stages"].items()}})
+
+    for batch_size in args.batch_sizes:
+        agent.executor.reset_stats()
+        start = time.perf_counter()
+        first = None
+        latencies = []
+        async for response in agent.answer_batch(pairs, batch_size):
+            first = first or time.perf_counter() - start
+            latencies.append(response["latency"])
+        elapsed = time.perf_counter() - start
+        results.append({"mode": f"answer_batch {batch_size}", "seconds": elapsed,
+                        "questions_per_sec": len(pairs) / elapsed, "first_result_s": first,
+                        "latency": latency_summary(latencies),
+                        "executor_calls": {k: v["count"] for k, v in agent.executor.stats()["stages"].items()}})
+
+    agent.learning_system.store.close()
+    agent.executor.shutdown()
+    return {"questions": len(pairs), "results": results, "peak_rss_mb": peak_rss_mb()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=300)
+    parser.add_argument("--sentences", type=int, default=40, help="Sentences per document")
+    parser.add_argument("--questions", type=int, default=500)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent handle_query calls")
+    parser.add_argument("--batch-sizes", type=lambda s: [int(x) for x in s.split(",")], default=[16, 64, 256])
+    parser.add_argument("--backend", choices=["numpy", "chroma"], default="numpy")
+    parser.add_argument("--models", choices=["stub", "local"], default="stub")
+    parser.add_argument("--stub-embed-ms", type=float, default=0.5, help="Stub encoder cost per text")
+    parser.add_argument("--stub-qa-ms", type=float, default=20.0, help="Stub QA cost per 384-token window")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_batch_results.json")
+    args = parser.parse_args(argv)
+
+    if args.models == "stub":
+        install_stub_models(args.stub_embed_ms, args.stub_qa_ms)
+    Config.SEMANTIC_CACHE_ENABLED = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        isolate_storage(tmp, args.backend)
+        report = asyncio.run(run(args))
+    report["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for result in report["results"]:
+        print(f"{result['mode']:>20}: {result['questions_per_sec']:.1f} questions/s, "
+              f"{result['executor_calls'].get('retrieve', 0)} retrieval calls, "
+              f"{result['executor_calls'].get('qa', 0)} QA calls")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""QA cost and answer quality with the full retrieved context vs ContextSelector's pruned one.
+
+Loads the configured embedding and QA models. Cases come from a JSONL file of
+{"question", "answer", "passages": [...]} records (e.g. SQuAD paragraphs plus
+retrieved distractors), or from a small built-in STEM set:
+
+    python -m benchmarks.bench_context_selection --data cases.jsonl --repeat 3
+"""
+import re
+import sys
+import json
+import time
+import string
+import argparse
+from collections import Counter
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.model_registry import ModelRegistry
+from ai_tutor_bot.utils.context_selector import ContextSelector
+
+FILLER = ("The laboratory report should list every measurement with its uncertainty. "
+          "Students often confuse precision with accuracy when reading instruments. "
+          "Historical notes describe how early scientists shared results by letter. ")
+
+BUILTIN_CASES = [
+    ("What does Newton's second law relate?", "force, mass and acceleration",
+     "Newton's second law relates force, mass and acceleration through F = ma. "
+     "A larger net force produces a larger acceleration for the same mass."),
+    ("What is the pH of pure water at 25 degrees Celsius?", "7",
+     "Pure water at 25 degrees Celsius has a pH of 7. Acids have a pH below 7 and bases above it."),
+    ("Where does photosynthesis take place?", "in the chloroplasts",
+     "Photosynthesis takes place in the chloroplasts of plant cells. It converts light energy into chemical energy."),
+    ("What does the Schrödinger equation describe?", "how the quantum state of a system changes over time",
+     "The Schrödinger equation describes how the quantum state of a system changes over time. "
+     "Its solutions are wave functions."),
+    ("What is the derivative of x squared?", "2x",
+     "Using the power rule, the derivative of x squared is 2x. The power rule lowers the exponent by one."),
+    ("What carries genetic information in most organisms?", "DNA",
+     "In most organisms DNA carries genetic information. Genes are segments of DNA that code for proteins."),
+]
+
+
+def builtin_cases(distractors: int):
+    cases = []
+    for i, (question, answer, passage) in enumerate(BUILTIN_CASES):
+        others = [p for j, (_, _, p) in enumerate(BUILTIN_CASES) if j != i]
+        passages = [FILLER * 4 + passage + " " + FILLER * 4] + [FILLER * 6 + p for p in others[:distractors]]
+        cases.append({"question": question, "answer": answer, "passages": passages})
+    return cases
+
+
+_PUNCTUATION = set(string.punctuation)
+
+
+def normalize_answer(text: str) -> str:
+    text = "".join(ch for ch in text.lower() if ch not in _PUNCTUATION)
+    text = re.sub(r'\b(a|an|the)\b', " ", text)
+    return " ".join(text.split())
+
+
+def f1_score(prediction: str, truth: str) -> float:
+    pred, gold = normalize_answer(prediction).split(), normalize_answer(truth).split()
+    common = sum((Counter(pred) & Counter(gold)).values())
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(pred), common / len(gold)
+    return 2 * precision * recall / (precision + recall)
+
+
+def qa_windows(tokenizer, question: str, context: str) -> int:
+    """Forward passes the QA pipeline needs for this question and context"""
+    encoded = tokenizer(question, context, truncation="only_second", max_length=Config.QA_MAX_SEQ_LEN,
+                        stride=128, return_overflowing_tokens=True)
+    return len(encoded["input_ids"])
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "mean_ms": float(ms.mean())}
+
+
+def evaluate(name, qa, cases, contexts, select_times, repeat):
+    latencies, windows, exact, f1 = [], [], [], []
+    for case, context, select_s in zip(cases, contexts, select_times):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            answer = qa({"question": case["question"], "context": context}, max_seq_len=Config.QA_MAX_SEQ_LEN)["answer"]
+            latencies.append(time.perf_counter() - start + select_s)
+        windows.append(qa_windows(qa.tokenizer, case["question"], context))
+        exact.append(float(normalize_answer(answer) == normalize_answer(case["answer"])))
+        f1.append(f1_score(answer, case["answer"]))
+    return {"context": name, **percentiles(latencies), "qa_windows_mean": float(np.mean(windows)),
+            "qa_windows_max": int(max(windows)), "exact_match": float(np.mean(exact)), "f1": float(np.mean(f1))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", help="JSONL with question, answer and passages")
+    parser.add_argument("--distractors", type=int, default=4, help="Distractor passages per built-in case")
+    parser.add_argument("--repeat", type=int, default=3, help="QA runs per case for latency")
+    args = parser.parse_args(argv)
+
+    if args.data:
+        with open(args.data, encoding="utf-8") as f:
+            cases = [json.loads(line) for line in f if line.strip()]
+    else:
+        cases = builtin_cases(args.distractors)
+
+    embed_model = ModelRegistry.get("embedding")
+    qa = ModelRegistry.get("qa")
+    selector = ContextSelector(qa.tokenizer)
+
+    full_contexts = ["\n".join(case["passages"]) for case in cases]
+    pruned_contexts, select_times = [], []
+    for case in cases:
+        start = time.perf_counter()
+        sentences = selector.split(case["passages"])
+        vectors = embed_model.encode([case["question"]] + [s for _, s in sentences],
+                                     show_progress_bar=False, convert_to_numpy=True)
+        pruned_contexts.append(selector.select(case["question"], vectors[0], sentences, vectors[1:]))
+        select_times.append(time.perf_counter() - start)
+
+    report = [
+        evaluate("full", qa, cases, full_contexts, [0.0] * len(cases), args.repeat),
+        evaluate("selected", qa, cases, pruned_contexts, select_times, args.repeat),
+    ]
+    report[1]["selection"] = percentiles(select_times)
+    json.dump({"cases": len(cases), "results": report}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
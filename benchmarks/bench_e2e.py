@@ -0,0 +1,169 @@
+"""End-to-end ingestion and query benchmark against TutorAgent.
+
+Generates a synthetic STEM corpus, ingests it into a throwaway index, then
+replays a query workload at each concurrency level. Runs offline with stub
+models by default; --models local loads the configured (or overridden) models:
+
+    python -m benchmarks.bench_e2e --docs 2000 --queries 500 --concurrency 1,8,32 --output results.json
+    python -m benchmarks.bench_e2e --models local --embedding-model sentence-transformers/all-MiniLM-L6-v2
+
+Results are written as JSON so runs can be diffed.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import platform
+import argparse
+import resource
+import tempfile
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.metrics import metrics
+from benchmarks.workload import synthetic_corpus, synthetic_queries, install_stub_models
+
+INGEST_STAGES = ("read", "lookup", "chunk", "delete", "embed", "upsert", "flush")
+
+
+def peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def latency_summary(samples) -> dict:
+    if not samples:
+        return {}
+    ms = np.array(samples) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)), "mean_ms": float(ms.mean()), "max_ms": float(ms.max())}
+
+
+def isolate_storage(root: str, backend: str):
+    """Point every persistent store at a scratch directory"""
+    Config.VECTOR_BACKEND = backend
+    Config.CHROMA_PATH = os.path.join(root, "chroma_db")
+    Config.NUMPY_INDEX_PATH = os.path.join(root, "numpy_index")
+    Config.TEXT_STORE_PATH = os.path.join(root, "chunk_text.db")
+    Config.CONCEPT_INDEX_PATH = os.path.join(root, "concept_index.json")
+    Config.BM25_INDEX_PATH = os.path.join(root, "bm25_index.pkl")
+    Config.PROGRESS_DB_PATH = os.path.join(root, "learning_progress.db")
+    Config.EMBEDDING_CACHE_DIR = os.path.join(root, "embedding_cache")
+
+
+async def replay(agent, queries, concurrency: int) -> dict:
+    agent.executor.reset_stats()
+    metrics.reset()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, cache_hits, failures = [], 0, 0
+
+    async def one(item):
+        nonlocal cache_hits, failures
+        async with semaphore:
+            start = time.perf_counter()
+            response = await agent.handle_query(item["user_id"], item["query"])
+            latencies.append(time.perf_counter() - start)
+            cache_hits += bool(response.get("cache_hit"))
+            failures += not response.get("context")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(item) for item in queries))
+    elapsed = time.perf_counter() - start
+    stats = agent.executor_stats()
+    return {
+        "concurrency": concurrency,
+        "queries": len(queries),
+        "seconds": elapsed,
+        "queries_per_sec": len(queries) / elapsed if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+        "cache_hit_rate": cache_hits / len(queries) if queries else 0.0,
+        "empty_answers": failures,
+        # Executor stages (queue wait and run time) and request spans (embed_query/retrieve/qa/relevance/...)
+        "stages": stats["stages"],
+        "spans": metrics.snapshot(),
+        "batching": stats["batching"],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def run(args) -> dict:
+    from agents.tutor_agent import TutorAgent
+
+    agent = TutorAgent()
+    corpus = synthetic_corpus(args.docs, args.sentences, args.seed)
+    ingestion = await agent.ingest_documents(corpus)
+    stages = agent.executor.stats()["stages"]
+    ingestion["stages"] = {name: stages[name] for name in INGEST_STAGES if name in stages}
+    ingestion["peak_rss_mb"] = peak_rss_mb()
+
+    queries = synthetic_queries(args.queries, args.users, args.seed)
+    levels = []
+    for concurrency in args.concurrency:
+        if agent.response_cache is not None and not args.keep_cache:
+            # Each level starts cold so levels are comparable
+            agent.response_cache.clear()
+        levels.append(await replay(agent, queries, concurrency))
+
+    agent.learning_system.store.close()
+    agent.executor.shutdown()
+    return {"ingestion": ingestion, "queries": levels}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--sentences", type=int, default=40, help="Sentences per document")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 8, 32],
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--backend", choices=["numpy", "chroma"], default="numpy")
+    parser.add_argument("--models", choices=["stub", "local"], default="stub")
+    parser.add_argument("--embedding-model", help="Override Config.EMBEDDING_MODEL for --models local")
+    parser.add_argument("--qa-model", help="Override Config.QA_MODEL for --models local")
+    parser.add_argument("--stub-embed-ms", type=float, default=0.5, help="Stub encoder cost per text")
+    parser.add_argument("--stub-qa-ms", type=float, default=20.0, help="Stub QA cost per 384-token window")
+    parser.add_argument("--keep-cache", action="store_true", help="Keep semantic cache entries across levels")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    if args.models == "stub":
+        install_stub_models(args.stub_embed_ms, args.stub_qa_ms)
+    else:
+        Config.EMBEDDING_MODEL = args.embedding_model or Config.EMBEDDING_MODEL
+        Config.QA_MODEL = args.qa_model or Config.QA_MODEL
+
+    with tempfile.TemporaryDirectory() as tmp:
+        isolate_storage(tmp, args.backend)
+        results = asyncio.run(run(args))
+
+    results["config"] = {
+        **{k: v for k, v in vars(args).items() if k != "output"},
+        "embedding_model": Config.EMBEDDING_MODEL if args.models == "local" else "stub",
+        "qa_model": Config.QA_MODEL if args.models == "local" else "stub",
+        "chunk_mode": Config.CHUNK_MODE,
+        "top_k": Config.TOP_K,
+        "hybrid_search": Config.HYBRID_SEARCH,
+        "context_selection": Config.CONTEXT_SELECTION,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+    results["peak_rss_mb"] = peak_rss_mb()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    ingestion = results["ingestion"]
+    print(f"ingest: {ingestion['documents']} docs, {ingestion['chunks']} chunks in {ingestion['seconds']:.2f}s "
+          f"({ingestion['docs_per_sec']:.1f} docs/s)")
+    for level in results["queries"]:
+        latency = level["latency"]
+        print(f"concurrency={level['concurrency']:>3}: {level['queries_per_sec']:.1f} q/s, "
+              f"p50={latency['p50_ms']:.1f}ms p95={latency['p95_ms']:.1f}ms p99={latency['p99_ms']:.1f}ms, "
+              f"cache hits {level['cache_hit_rate']:.0%}")
+    print(f"peak RSS {results['peak_rss_mb']:.0f} MB, results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
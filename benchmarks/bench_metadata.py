@@ -0,0 +1,67 @@
+"""Per-chunk metadata extraction cost: previous per-keyword scan vs extract_metadata_batch.
+
+    python -m benchmarks.bench_metadata --chunks 10000
+"""
+import re
+import time
+import random
+import argparse
+from ai_tutor_bot.utils.text_processor import TextProcessor
+
+WORDS = ("force energy velocity equation theorem derivative integral atom molecule reaction "
+         "cell protein gene the of and a to is in that Newton's Second Law Ohm Maxwell Gauss "
+         "F = ma V=IR E = mc^2 x + y Schrodinger Pythagorean Theorem momentum entropy").split()
+
+
+def legacy_extract_metadata(text):
+    # The implementation extract_metadata_batch replaced, kept for comparison
+    metadata = {}
+    subjects = {
+        "math": ["equation", "theorem", "calculate", "solve", "derivative", "integral"],
+        "physics": ["force", "energy", "velocity", "quantum", "electron"],
+        "chemistry": ["atom", "molecule", "reaction", "bond", "pH"],
+        "biology": ["cell", "dna", "protein", "photosynthesis", "gene"]
+    }
+    subject = "general"
+    for sub, keywords in subjects.items():
+        if any(keyword in text.lower() for keyword in keywords):
+            subject = sub
+            break
+    metadata['subject'] = subject
+    concepts = []
+    concepts.extend(re.findall(r'[a-zA-Z0-9_]+[\s]*[=+\-*/^][\s]*[a-zA-Z0-9_]+', text))
+    theorems = re.findall(r'[A-Z][a-z]+(\'s)? [A-Z][a-z]+ (Theorem|Law|Identity)', text)
+    concepts.extend([t[0] for t in theorems])
+    concepts.extend(re.findall(r'\b[A-Z][a-z]+\b(?:\s+[A-Z][a-z]+)*', text))
+    if concepts:
+        metadata['concepts'] = ", ".join(list(set(concepts))[:5])
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=200, help="Words per chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    chunks = [" ".join(rng.choice(WORDS) for _ in range(args.words)) for _ in range(args.chunks)]
+
+    start = time.perf_counter()
+    legacy = [legacy_extract_metadata(chunk) for chunk in chunks]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = TextProcessor.extract_metadata_batch(chunks)
+    batch_s = time.perf_counter() - start
+
+    same_subject = sum(a["subject"] == b["subject"] for a, b in zip(legacy, batch))
+    print(f"chunks={args.chunks} words/chunk={args.words}")
+    print(f"legacy:  {legacy_s:.3f}s ({legacy_s / args.chunks * 1e6:.1f} us/chunk)")
+    print(f"batch:   {batch_s:.3f}s ({batch_s / args.chunks * 1e6:.1f} us/chunk)")
+    print(f"speedup: {legacy_s / batch_s:.2f}x, subject agreement {same_subject}/{args.chunks}")
+
+
+if __name__ == "__main__":
+    main()
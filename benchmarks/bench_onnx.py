@@ -0,0 +1,133 @@
+"""Parity and CPU latency of the ONNX Runtime (int8) models against the PyTorch ones.
+
+Exports the configured models on first run (cached under Config.ONNX_CACHE_DIR):
+
+    python -m benchmarks.bench_onnx --threads 4 --quantization avx2
+
+Exits with status 1 when the ONNX models fall below the parity bars (minimum
+embedding cosine and the share of QA cases with the same answer as PyTorch),
+so run it before switching INFERENCE_BACKEND to "onnx" or changing quantization.
+"""
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils import onnx_models
+from benchmarks.bench_context_selection import BUILTIN_CASES, f1_score, percentiles
+
+SENTENCES = [case[2] for case in BUILTIN_CASES] + [case[0] for case in BUILTIN_CASES] + [
+    "Kinetic energy is one half of mass times velocity squared.",
+    "An electron carries a negative elementary charge.",
+    "The integral of a derivative recovers the original function up to a constant.",
+    "Covalent bonds form when atoms share electron pairs.",
+]
+
+
+def time_calls(fn, inputs, repeat):
+    latencies = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+
+def throughput(fn, batch, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(batch)
+    return len(batch) * repeat / (time.perf_counter() - start)
+
+
+def parity_failures(report, min_cosine: float, min_agreement: float):
+    """Human-readable reasons the ONNX models miss the parity bars; empty when they pass"""
+    failures = []
+    cosine_min = report["embedding"]["cosine_min"]
+    if cosine_min < min_cosine:
+        failures.append(f"embedding cosine_min {cosine_min:.4f} < {min_cosine}")
+    same_answer = report["qa"]["same_answer"]
+    if same_answer < min_agreement:
+        failures.append(f"QA answer agreement {same_answer:.2f} < {min_agreement}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads for both runtimes, 0 = default")
+    parser.add_argument("--quantization", default=Config.ONNX_QUANTIZATION,
+                        help="avx2, avx512, avx512_vnni, arm64 or none")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=32, help="Texts per call for the throughput run")
+    parser.add_argument("--min-cosine", type=float, default=0.99,
+                        help="Lowest allowed cosine between ONNX and PyTorch embeddings of the same text")
+    parser.add_argument("--min-agreement", type=float, default=0.8,
+                        help="Lowest allowed share of QA cases where ONNX returns the PyTorch answer")
+    args = parser.parse_args(argv)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from transformers import pipeline
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    Config.ONNX_INTRA_OP_THREADS = args.threads
+    Config.ONNX_QUANTIZATION = None if args.quantization.lower() == "none" else args.quantization
+
+    torch_embed = SentenceTransformer(Config.EMBEDDING_MODEL, device="cpu")
+    torch_qa = pipeline('question-answering', model=Config.QA_MODEL, tokenizer=Config.QA_MODEL, device=-1)
+    start = time.perf_counter()
+    onnx_embed = onnx_models.load_embedding_model()
+    onnx_qa = onnx_models.load_qa_pipeline()
+    onnx_load_s = time.perf_counter() - start
+
+    def encoder(model):
+        return lambda texts: model.encode(texts, batch_size=len(texts), show_progress_bar=False,
+                                          convert_to_numpy=True)
+
+    # Embedding parity: cosine between the two runtimes' vectors for the same text
+    reference = encoder(torch_embed)(SENTENCES)
+    candidate = encoder(onnx_embed)(SENTENCES)
+    cosines = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1))
+
+    # QA parity: same answer span, and token F1 against the PyTorch answer and the reference answer
+    qa_inputs = [{"question": q, "context": c} for q, _, c in BUILTIN_CASES]
+    torch_answers = [torch_qa(x, max_seq_len=Config.QA_MAX_SEQ_LEN)["answer"] for x in qa_inputs]
+    onnx_answers = [onnx_qa(x, max_seq_len=Config.QA_MAX_SEQ_LEN)["answer"] for x in qa_inputs]
+
+    batch = (SENTENCES * (args.batch // len(SENTENCES) + 1))[:args.batch]
+    report = {
+        "quantization": Config.ONNX_QUANTIZATION or "fp32",
+        "threads": args.threads or "default",
+        "onnx_load_s": onnx_load_s,
+        "embedding": {
+            "cosine_min": float(cosines.min()),
+            "cosine_mean": float(cosines.mean()),
+            "torch_single": time_calls(lambda t: encoder(torch_embed)([t]), SENTENCES, args.repeat),
+            "onnx_single": time_calls(lambda t: encoder(onnx_embed)([t]), SENTENCES, args.repeat),
+            "torch_texts_per_s": throughput(encoder(torch_embed), batch, args.repeat),
+            "onnx_texts_per_s": throughput(encoder(onnx_embed), batch, args.repeat),
+        },
+        "qa": {
+            "same_answer": sum(a == b for a, b in zip(torch_answers, onnx_answers)) / len(qa_inputs),
+            "f1_vs_torch": float(np.mean([f1_score(b, a) for a, b in zip(torch_answers, onnx_answers)])),
+            "torch_f1": float(np.mean([f1_score(a, case[1]) for a, case in zip(torch_answers, BUILTIN_CASES)])),
+            "onnx_f1": float(np.mean([f1_score(b, case[1]) for b, case in zip(onnx_answers, BUILTIN_CASES)])),
+            "torch_single": time_calls(lambda x: torch_qa(x, max_seq_len=Config.QA_MAX_SEQ_LEN), qa_inputs, args.repeat),
+            "onnx_single": time_calls(lambda x: onnx_qa(x, max_seq_len=Config.QA_MAX_SEQ_LEN), qa_inputs, args.repeat),
+        },
+    }
+    failures = parity_failures(report, args.min_cosine, args.min_agreement)
+    report["parity"] = {"min_cosine": args.min_cosine, "min_agreement": args.min_agreement,
+                        "passed": not failures}
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if failures:
+        print("ONNX parity check FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Time and memory to first prompt of main.py with deferred vs eager model loading.
+
+Starts main.py in a subprocess, answers the prompts and exits, and reads the
+time and peak RSS it reports for reaching the name prompt. Also times
+importing the agent:
+
+    python -m benchmarks.bench_startup --runs 3
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Tuple
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PROMPT_TIME = re.compile(r'Time to first prompt: ([0-9.]+)s, peak RSS ([0-9.]+) MB')
+
+
+def time_to_first_prompt(eager: bool, timeout: float) -> Tuple[float, float]:
+    """Seconds and peak RSS in MB at the name prompt"""
+    args = [sys.executable, os.path.join(ROOT, "main.py"), "--timing"] + (["--eager"] if eager else [])
+    result = subprocess.run(args, input="bench\nexit\n", capture_output=True, text=True,
+                            timeout=timeout, cwd=os.getcwd(), env={**os.environ, "PYTHONPATH": ROOT})
+    match = _PROMPT_TIME.search(result.stdout)
+    if match is None:
+        raise RuntimeError(f"main.py did not reach the prompt:\n{result.stdout[-2000:]}\n{result.stderr[-2000:]}")
+    return float(match.group(1)), float(match.group(2))
+
+
+def import_seconds(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env={**os.environ, "PYTHONPATH": ROOT})
+    return float(result.stdout.strip())
+
+
+def summary(samples):
+    return {"median_s": float(np.median(samples)), "min_s": float(min(samples)), "max_s": float(max(samples))}
+
+
+def prompt_summary(runs):
+    seconds, rss = zip(*runs)
+    return {**summary(seconds), "peak_rss_mb": float(max(rss))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--skip-eager", action="store_true", help="Only measure the deferred mode")
+    args = parser.parse_args(argv)
+
+    report = {"import_agent": summary([import_seconds("agents.tutor_agent") for _ in range(args.runs)])}
+    start = time.perf_counter()
+    report["deferred"] = prompt_summary([time_to_first_prompt(False, args.timeout) for _ in range(args.runs)])
+    if not args.skip_eager:
+        report["eager"] = prompt_summary([time_to_first_prompt(True, args.timeout) for _ in range(args.runs)])
+    report["wall_s"] = time.perf_counter() - start
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
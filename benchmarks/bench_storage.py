@@ -0,0 +1,118 @@
+"""Disk and memory footprint of the vector store layouts.
+
+Ingests the same synthetic corpus once per layout and reports bytes on disk
+per store, the Python allocation peak during ingestion, the memory held by a
+freshly reopened store, and the size of one query vector in each payload form:
+
+    python -m benchmarks.bench_storage --docs 300 --dim 768
+    python -m benchmarks.bench_storage --backend chroma
+"""
+import os
+import json
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+from benchmarks.workload import synthetic_corpus, install_stub_models
+from benchmarks.bench_e2e import isolate_storage
+
+# name -> (CHUNK_TEXT_IN_METADATA, NUMPY_INDEX_DTYPE, EMBEDDING_CACHE_DTYPE)
+LAYOUTS = {
+    "text_in_metadata_f32": (True, "float32", "float32"),
+    "text_store_f32": (False, "float32", "float32"),
+    "text_store_f16": (False, "float16", "float16"),
+}
+
+
+def disk_bytes(path: str) -> int:
+    if os.path.isfile(path):
+        # SQLite stores keep recent writes in a -wal file beside the database
+        return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def payload_bytes(dim: int) -> dict:
+    vector = np.random.default_rng(0).standard_normal(dim).astype(np.float32)
+    as_list = vector.tolist()
+    return {
+        "python_list": sum(map(object.__sizeof__, as_list)) + as_list.__sizeof__(),
+        "float32": vector.nbytes,
+        "float16": vector.astype(np.float16).nbytes,
+    }
+
+
+async def run_layout(args) -> dict:
+    from agents.tutor_agent import TutorAgent
+    from ai_tutor_bot.db.vector_db import VectorDBManager
+
+    agent = TutorAgent()
+    tracemalloc.start()
+    ingestion = await agent.ingest_documents(synthetic_corpus(args.docs, args.sentences, args.seed))
+    ingest_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    await agent.db_manager.async_flush()
+    agent.learning_system.store.close()
+    agent.executor.shutdown()
+
+    stores = {
+        "vectors": Config.NUMPY_INDEX_PATH if Config.VECTOR_BACKEND == "numpy" else Config.CHROMA_PATH,
+        "chunk_text": Config.TEXT_STORE_PATH,
+        "embedding_cache": Config.EMBEDDING_CACHE_DIR,
+        "bm25_index": Config.BM25_INDEX_PATH,
+        "concept_index": Config.CONCEPT_INDEX_PATH,
+    }
+    disk = {name: disk_bytes(path) for name, path in stores.items() if os.path.exists(path)}
+
+    tracemalloc.start()
+    reopened = VectorDBManager()
+    reopened.open()
+    reopen_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        "chunks": ingestion.get("chunks"),
+        "disk_bytes": disk,
+        "disk_total_mb": sum(disk.values()) / 2 ** 20,
+        "ingest_peak_python_mb": ingest_peak / 2 ** 20,
+        "reopened_python_mb": reopen_bytes / 2 ** 20,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--sentences", type=int, default=40, help="Sentences per document")
+    parser.add_argument("--dim", type=int, default=768, help="Stub embedding dimension")
+    parser.add_argument("--backend", choices=["numpy", "chroma"], default="numpy")
+    parser.add_argument("--layouts", type=lambda s: s.split(","), default=list(LAYOUTS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_storage_results.json")
+    args = parser.parse_args(argv)
+
+    install_stub_models(dim=args.dim)
+    Config.SEMANTIC_CACHE_ENABLED = False
+
+    report = {"payload_bytes_per_vector": payload_bytes(args.dim), "layouts": {}}
+    for name in args.layouts:
+        Config.CHUNK_TEXT_IN_METADATA, Config.NUMPY_INDEX_DTYPE, Config.EMBEDDING_CACHE_DTYPE = LAYOUTS[name]
+        with tempfile.TemporaryDirectory() as tmp:
+            isolate_storage(tmp, args.backend)
+            report["layouts"][name] = asyncio.run(run_layout(args))
+    report["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"payload per {args.dim}-dim vector: " +
+          ", ".join(f"{k} {v} B" for k, v in report["payload_bytes_per_vector"].items()))
+    for name, result in report["layouts"].items():
+        print(f"{name:>22}: {result['disk_total_mb']:.1f} MB on disk, "
+              f"ingest peak {result['ingest_peak_python_mb']:.1f} MB, "
+              f"reopened {result['reopened_python_mb']:.1f} MB")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Recall and latency of the NumPy exact index against ChromaDB's HNSW index.
+
+Runs offline on synthetic clustered embeddings:
+
+    python -m benchmarks.bench_vector_backends --vectors 50000 --queries 200
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+from ai_tutor_bot.db.numpy_backend import NumpyBackend
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "mean_ms": float(ms.mean())}
+
+
+def run_backend(name, backend, ids, vectors, metadatas, queries, k, where, batch):
+    start = time.perf_counter()
+    for i in range(0, len(ids), batch):
+        backend.upsert(ids[i:i + batch], vectors[i:i + batch], metadatas[i:i + batch])
+    build = time.perf_counter() - start
+
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        matches = backend.query([query], k, where)[0]
+        latencies.append(time.perf_counter() - start)
+        results.append([m["id"] for m in matches])
+    return {"backend": name, "build_s": build, **percentiles(latencies)}, results
+
+
+def recall(results, truth):
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return hits / max(1, sum(len(t) for t in truth))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--filter", action="store_true", help="Restrict queries to one subject")
+    parser.add_argument("--skip-chroma", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    vectors = synthetic_vectors(args.vectors + args.queries, args.dim, 64, rng)
+    vectors, queries = vectors[:args.vectors], vectors[args.vectors:]
+    subjects = ["math", "physics", "chemistry", "biology", "general"]
+    ids = [f"doc{i // 8}_{i % 8}" for i in range(args.vectors)]
+    metadatas = [{"doc_id": f"doc{i // 8}", "subject": subjects[i % len(subjects)]} for i in range(args.vectors)]
+    where = {"subject": "physics"} if args.filter else None
+    batch = 1000
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        exact, truth = run_backend("numpy-float32", NumpyBackend(f"{tmp}/f32", "float32"),
+                                   ids, vectors, metadatas, queries, args.k, where, batch)
+        exact["recall"] = 1.0
+        report.append(exact)
+
+        half, results = run_backend("numpy-float16", NumpyBackend(f"{tmp}/f16", "float16"),
+                                    ids, vectors, metadatas, queries, args.k, where, batch)
+        half["recall"] = recall(results, truth)
+        report.append(half)
+
+        if not args.skip_chroma:
+            from ai_tutor_bot.db.chroma_backend import ChromaBackend
+            chroma = ChromaBackend(path=f"{tmp}/chroma", collection_name="bench")
+            batch = min(batch, chroma.max_batch_size())
+            stats, results = run_backend("chroma-hnsw", chroma, ids, vectors, metadatas, queries, args.k, where, batch)
+            stats["recall"] = recall(results, truth)
+            report.append(stats)
+
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""HTTP load test of server.py: throughput and latency at each worker count.
+
+For each --workers value it starts the server on a scratch copy of every store,
+ingests a synthetic corpus through POST /ingest, then sends the query workload
+from --concurrency client threads over keep-alive connections. By default the
+server uses stub models that spin holding the GIL, so one process cannot scale
+past one core and the gain from more workers is visible offline:
+
+    python -m benchmarks.load_test --workers 1,2,4 --concurrency 16 --queries 400
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 16   # already running server
+
+Memory (RSS, and PSS, which splits shared pages between processes) covers the
+supervisor and all its children, read from /proc on Linux.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from benchmarks.workload import synthetic_corpus, synthetic_queries
+from benchmarks.bench_e2e import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request(conn: http.client.HTTPConnection, method: str, path: str, payload=None) -> Dict:
+    body = json.dumps(payload).encode("utf-8") if payload is not None else None
+    conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    data = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path} returned {response.status}: {data[:200]!r}")
+    return json.loads(data)
+
+
+def wait_until_healthy(host: str, port: int, timeout: float, process: Optional[subprocess.Popen] = None) -> Dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            return request(http.client.HTTPConnection(host, port, timeout=5), "GET", "/health")
+        except (OSError, RuntimeError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on {host}:{port} not healthy after {timeout}s")
+
+
+def process_tree_memory(pid: int) -> Dict[str, float]:
+    """RSS and PSS in MB summed over pid and its children"""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        return {}
+    totals = {"rss_mb": 0.0, "pss_mb": 0.0}
+    for child in pids:
+        try:
+            with open(f"/proc/{child}/smaps_rollup") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in ("Rss", "Pss"):
+                        totals[f"{key.lower()}_mb"] += int(value.split()[0]) / 1024
+        except OSError:
+            continue
+    totals["processes"] = len(pids)
+    return totals
+
+
+def run_load(host: str, port: int, queries: List[Dict[str, str]], concurrency: int) -> Dict:
+    work: "queue.SimpleQueue[Dict[str, str]]" = queue.SimpleQueue()
+    for item in queries:
+        work.put(item)
+    latencies, errors, cache_hits = [], [], [0]
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection(host, port, timeout=300)
+        while True:
+            try:
+                item = work.get_nowait()
+            except queue.Empty:
+                break
+            start = time.perf_counter()
+            try:
+                response = request(conn, "POST", "/query", item)
+            except Exception as e:
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=300)
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                cache_hits[0] += bool(response.get("cache_hit"))
+        conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "queries": len(queries),
+        "seconds": elapsed,
+        "queries_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+        "cache_hit_rate": cache_hits[0] / len(latencies) if latencies else 0.0,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure(args, workers: Optional[int]) -> Dict:
+    """One load run, against a fresh local server with this many workers or against --url"""
+    process = None
+    tmp = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        tmp = tempfile.TemporaryDirectory()
+        command = [sys.executable, "-m", "benchmarks.load_test", "--serve", "--storage", tmp.name,
+                   "--port", str(port), "--workers", str(workers), "--models", args.models,
+                   "--backend", args.backend, "--stub-embed-ms", str(args.stub_embed_ms),
+                   "--stub-qa-ms", str(args.stub_qa_ms)] + (["--cache"] if args.cache else [])
+        process = subprocess.Popen(command, cwd=ROOT)
+    try:
+        health = wait_until_healthy(host, port, args.startup_timeout, process)
+        conn = http.client.HTTPConnection(host, port, timeout=3600)
+        ingestion = None
+        if args.docs:
+            ingestion = request(conn, "POST", "/ingest",
+                                {"documents": list(synthetic_corpus(args.docs, args.sentences, args.seed))})
+
+        queries = synthetic_queries(args.queries, args.users, args.seed)
+        run_load(host, port, queries[:max(args.concurrency, len(queries) // 10)], args.concurrency)  # warm-up
+        result = run_load(host, port, queries, args.concurrency)
+        result["workers"] = workers
+        result["ingestion"] = ingestion
+        result["memory"] = process_tree_memory(process.pid if process else health["supervisor"])
+        return result
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=60)
+            tmp.cleanup()
+
+
+def serve(args):
+    """Server side of a local run: stub models (optional) and scratch storage, then server.serve()"""
+    import logging
+    import server
+    from ai_tutor_bot.utils.config import Config
+    from benchmarks.bench_e2e import isolate_storage
+    from benchmarks.workload import install_stub_models
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.models == "stub":
+        install_stub_models(args.stub_embed_ms, args.stub_qa_ms, busy=True)
+    Config.SEMANTIC_CACHE_ENABLED = args.cache
+    isolate_storage(args.storage, args.backend)
+    server.serve("127.0.0.1", args.port, args.workers[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4],
+                        help="Comma-separated worker counts")
+    parser.add_argument("--url", help="Load an already running server instead of starting one per worker count")
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads")
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--docs", type=int, default=200, help="Documents ingested before the run, 0 skips ingestion")
+    parser.add_argument("--sentences", type=int, default=40, help="Sentences per document")
+    parser.add_argument("--backend", choices=["numpy", "chroma"], default="numpy")
+    parser.add_argument("--models", choices=["stub", "local"], default="stub")
+    parser.add_argument("--stub-embed-ms", type=float, default=0.5, help="Stub encoder cost per text")
+    parser.add_argument("--stub-qa-ms", type=float, default=20.0, help="Stub QA cost per 384-token window")
+    parser.add_argument("--cache", action="store_true", help="Keep the semantic answer cache enabled")
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--storage", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args)
+        return
+
+    levels = [measure(args, None)] if args.url else [measure(args, workers) for workers in args.workers]
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"config": {k: v for k, v in vars(args).items() if k not in ("serve", "storage", "port")},
+                   "cpus": os.cpu_count(), "levels": levels}, f, indent=2)
+
+    baseline = levels[0]["queries_per_sec"]
+    for level in levels:
+        latency = level["latency"]
+        memory = level["memory"]
+        print(f"workers={level['workers'] or '?':>3}: {level['queries_per_sec']:.1f} q/s "
+              f"(x{level['queries_per_sec'] / baseline if baseline else 0:.2f}), "
+              f"p50={latency.get('p50_ms', 0):.1f}ms p95={latency.get('p95_ms', 0):.1f}ms "
+              f"p99={latency.get('p99_ms', 0):.1f}ms, errors {level['errors']}"
+              + (f", RSS {memory['rss_mb']:.0f} MB / PSS {memory['pss_mb']:.0f} MB" if memory else ""))
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
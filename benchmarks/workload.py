@@ -0,0 +1,160 @@
+"""Synthetic STEM corpora, query workloads and stub models for offline benchmarks.
+
+The stubs follow the interfaces TutorAgent uses (encode(), the QA pipeline call,
+a fast tokenizer with offsets) and can sleep, or spin holding the GIL, to emulate
+model cost, so the pipeline around the models can be measured without
+downloading weights.
+"""
+import re
+import time
+import random
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.model_registry import ModelRegistry
+
+TOPICS = {
+    "physics": ["Newton's Second Law", "F = ma", "kinetic energy", "velocity", "momentum",
+                "electron", "E = mc^2", "quantum tunnelling", "Ohm's Law", "V = IR"],
+    "chemistry": ["pH", "covalent bond", "molecule", "reaction rate", "atom", "Avogadro's Number",
+                  "PV = nRT", "oxidation", "catalyst", "electronegativity"],
+    "biology": ["photosynthesis", "DNA", "protein folding", "cell membrane", "gene expression",
+                "Mendel's Law", "mitochondria", "enzyme", "natural selection", "ATP"],
+    "math": ["derivative", "integral", "Pythagorean Theorem", "a^2 + b^2", "equation", "eigenvalue",
+             "Bayes' Theorem", "limit", "matrix", "prime number"],
+}
+
+SENTENCES = [
+    "{a} is closely related to {b} in many introductory problems.",
+    "To calculate {a}, students first identify {b} and then solve the equation.",
+    "The Textbook explains {a} with a worked example about {b}.",
+    "Experiments on {a} show how {b} changes under controlled conditions.",
+    "A common mistake is to confuse {a} with {b}.",
+    "{a} can be derived step by step, and {b} follows as a special case.",
+]
+
+QUESTIONS = [
+    "What is {a}?",
+    "How is {a} related to {b}?",
+    "Explain {a} with an example.",
+    "Why does {a} matter when studying {b}?",
+    "How do you calculate {a}?",
+]
+
+
+def synthetic_corpus(docs: int, sentences_per_doc: int, seed: int = 0) -> Iterator[Dict[str, str]]:
+    """Yield {id, source, text} documents; each stays mostly within one subject"""
+    rng = random.Random(seed)
+    subjects = list(TOPICS)
+    for i in range(docs):
+        subject = subjects[i % len(subjects)]
+        topics = TOPICS[subject]
+        sentences = []
+        for _ in range(sentences_per_doc):
+            pool = topics if rng.random() < 0.85 else TOPICS[rng.choice(subjects)]
+            a, b = rng.sample(pool, 2)
+            sentences.append(rng.choice(SENTENCES).format(a=a, b=b))
+        yield {"id": f"{subject}-{i}", "source": f"{subject}_notes", "text": " ".join(sentences)}
+
+
+def synthetic_queries(n: int, users: int, seed: int = 0) -> List[Dict[str, str]]:
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(n):
+        topics = TOPICS[rng.choice(list(TOPICS))]
+        a, b = rng.sample(topics, 2)
+        queries.append({"user_id": f"user-{rng.randrange(users)}", "query": rng.choice(QUESTIONS).format(a=a, b=b)})
+    return queries
+
+
+_WORD = re.compile(r'\w+|[^\w\s]')
+
+
+def spend(ms: float, busy: bool = False):
+    """Sleep for ms, or spin while holding the GIL like pure-Python model glue does"""
+    if not busy:
+        time.sleep(ms / 1000.0)
+        return
+    end = time.perf_counter() + ms / 1000.0
+    while time.perf_counter() < end:
+        pass
+
+
+class StubTokenizer:
+    """Word-level stand-in for a fast tokenizer: ids, offsets and special-token count"""
+
+    def __call__(self, texts, add_special_tokens: bool = False, return_offsets_mapping: bool = False, **kwargs):
+        single = isinstance(texts, str)
+        offsets = [[m.span() for m in _WORD.finditer(text)] for text in ([texts] if single else texts)]
+        encoded = {"input_ids": [list(range(len(o))) for o in offsets]}
+        if return_offsets_mapping:
+            encoded["offset_mapping"] = offsets
+        return {k: v[0] for k, v in encoded.items()} if single else encoded
+
+    def num_special_tokens_to_add(self, pair: bool = False) -> int:
+        return 4 if pair else 2
+
+
+class StubEncoder:
+    """Hashed bag-of-words embeddings, so related texts still land close together"""
+
+    def __init__(self, dim: int = 384, ms_per_text: float = 0.0, busy: bool = False):
+        self.dim = dim
+        self.ms_per_text = ms_per_text
+        self.busy = busy
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _WORD.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts, batch_size: Optional[int] = None, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if self.ms_per_text:
+            spend(self.ms_per_text * len(texts), self.busy)
+        vectors = np.stack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dim), np.float32)
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+
+class StubQAPipeline:
+    """Returns the context sentence sharing most words with the question; sleeps per QA window"""
+
+    def __init__(self, ms_per_window: float = 0.0, busy: bool = False):
+        self.tokenizer = StubTokenizer()
+        self.ms_per_window = ms_per_window
+        self.busy = busy
+
+    def _answer(self, item: Dict[str, str], max_seq_len: int) -> Dict[str, Any]:
+        question = set(_WORD.findall(item["question"].lower()))
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', item["context"]) if s] or [""]
+        if self.ms_per_window:
+            tokens = len(_WORD.findall(item["question"])) + len(_WORD.findall(item["context"]))
+            windows = max(1, -(-tokens // max_seq_len))
+            spend(self.ms_per_window * windows, self.busy)
+        best = max(sentences, key=lambda s: len(question & set(_WORD.findall(s.lower()))))
+        return {"answer": best, "score": 1.0, "start": 0, "end": len(best)}
+
+    def __call__(self, inputs, batch_size: Optional[int] = None, max_seq_len: Optional[int] = None, **kwargs):
+        max_seq_len = max_seq_len or Config.QA_MAX_SEQ_LEN
+        if isinstance(inputs, dict):
+            return self._answer(inputs, max_seq_len)
+        return [self._answer(item, max_seq_len) for item in inputs]
+
+
+def install_stub_models(embed_ms_per_text: float = 0.0, qa_ms_per_window: float = 0.0, dim: int = 384,
+                        busy: bool = False):
+    """Register the stubs so TutorAgent and the vector DB never load real weights"""
+    Config.DEVICE = Config.DEVICE or "cpu"
+    ModelRegistry.set("embedding", StubEncoder(dim, embed_ms_per_text, busy))
+    ModelRegistry.set("qa", StubQAPipeline(qa_ms_per_window, busy))
+    ModelRegistry.set("chunk_tokenizer", StubTokenizer())
@@ -0,0 +1,39 @@
+import sys
+import json
+import asyncio
+import argparse
+import logging
+from agents.tutor_agent import TutorAgent
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.ingestion import open_source, StreamingIngestor
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a JSONL file or a directory of text files into the tutor's knowledge base")
+    parser.add_argument("path", help="JSONL file (one {id, source, text} object per line) or directory of .txt/.md files")
+    parser.add_argument("--doc-batch-size", type=int, default=Config.INGEST_DOC_BATCH_SIZE)
+    parser.add_argument("--upsert-batch-size", type=int, default=Config.UPSERT_BATCH_SIZE)
+    parser.add_argument("--queue-depth", type=int, default=Config.INGEST_QUEUE_DEPTH)
+    parser.add_argument("--workers", type=int, default=Config.PREPROCESS_WORKERS,
+                        help="Processes for chunking and metadata extraction")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    tutor = TutorAgent()
+    ingestor = StreamingIngestor(
+        tutor,
+        doc_batch_size=args.doc_batch_size,
+        upsert_batch_size=args.upsert_batch_size,
+        queue_depth=args.queue_depth,
+        preprocess_workers=args.workers
+    )
+    report = await ingestor.run(open_source(args.path))
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1:]))
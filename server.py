@@ -0,0 +1,257 @@
+"""Multi-process HTTP server for the tutor (local-only by default).
+
+The parent loads the models once and then forks the workers, so the weights are
+shared copy-on-write instead of loaded per process. One more forked process,
+the store writer, is the only one that opens the vector store and the
+learning-progress database; workers send it retrieval, ingestion and progress
+calls and run embedding, context selection and QA themselves.
+
+    python server.py --workers 4 --port 8000
+
+    POST /query   {"user_id": "...", "query": "...", "trace": false}
+    POST /ingest  {"documents": [{"id": "...", "source": "...", "text": "..."}]}
+    GET  /metrics Prometheus text of the worker that answers, labelled with its worker id
+    GET  /health
+"""
+import os
+import sys
+import gc
+import json
+import time
+import signal
+import socket
+import asyncio
+import logging
+import argparse
+import functools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import Listener
+from agents.tutor_agent import TutorAgent
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.executor import InferenceExecutor
+from ai_tutor_bot.utils.adaptive_learning import AdaptiveLearningSystem
+from ai_tutor_bot.utils.model_registry import ModelRegistry, embedding_model_id
+from ai_tutor_bot.utils.embedding_cache import EmbeddingCache
+from ai_tutor_bot.utils.metrics import metrics
+from ai_tutor_bot.db.store_writer import StoreWriter, StoreClient, RemoteVectorDB, RemoteProgressStore, WriterError
+
+logger = logging.getLogger(__name__)
+
+# A worker that exits this soon after being forked is failing at startup and is not restarted
+MIN_WORKER_LIFETIME = 5.0
+
+
+class TutorRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "TutorServer/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json({"status": "ok", "worker": self.server.worker_id,
+                             "pid": os.getpid(), "supervisor": os.getppid()})
+        elif self.path == "/metrics":
+            body = metrics.prometheus(labels={"worker": str(self.server.worker_id)})
+            self._send(200, body.encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
+            return
+
+        if self.path == "/query":
+            user_id, query = payload.get("user_id"), payload.get("query")
+            if not isinstance(user_id, str) or not isinstance(query, str):
+                self._send_json({"error": "user_id and query must be strings"}, 400)
+                return
+            response = self.server.call(self.server.agent.handle_query(user_id, query, trace=payload.get("trace")))
+            self._send_json(response)
+        elif self.path == "/ingest":
+            documents = payload.get("documents")
+            if not isinstance(documents, list):
+                self._send_json({"error": "documents must be a list"}, 400)
+                return
+            try:
+                self._send_json(self.server.client.call("ingest", documents))
+            except WriterError as e:
+                self._send_json({"error": str(e)}, 500)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > Config.SERVER_MAX_BODY_BYTES:
+            raise ValueError(f"request body over {Config.SERVER_MAX_BODY_BYTES} bytes")
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        return payload
+
+    def _send_json(self, data, status: int = 200):
+        self._send(status, json.dumps(data).encode("utf-8"), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class WorkerHTTPServer(ThreadingHTTPServer):
+    """Serves on the listening socket inherited from the supervisor; the kernel spreads accepts across workers"""
+
+    daemon_threads = True
+
+    def __init__(self, sock: socket.socket, worker_id: int, agent: TutorAgent,
+                 client: StoreClient, loop: asyncio.AbstractEventLoop):
+        super().__init__(sock.getsockname()[:2], TutorRequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.worker_id = worker_id
+        self.agent = agent
+        self.client = client
+        self.loop = loop
+
+    def call(self, coro):
+        # Handler threads share one event loop so concurrent queries are micro-batched together
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+def _limit_threads(threads: int):
+    if "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(threads)
+
+
+def run_writer(listener: Listener):
+    agent = TutorAgent()
+    StoreWriter(agent, listener).serve()
+
+
+def run_worker(worker_id: int, sock: socket.socket, writer_address, authkey: bytes, threads: int):
+    _limit_threads(threads)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="worker-loop", daemon=True).start()
+
+    client = StoreClient(writer_address, authkey)
+    executor = InferenceExecutor()
+    # The store writer is the only process appending to the embedding cache's disk tier
+    embedding_cache = EmbeddingCache(embedding_model_id(), read_only=True) if Config.EMBEDDING_CACHE_ENABLED else None
+    agent = TutorAgent(executor=executor,
+                       db_manager=RemoteVectorDB(client, executor),
+                       learning_system=AdaptiveLearningSystem(store=RemoteProgressStore(client)),
+                       embedding_cache=embedding_cache)
+    if agent.response_cache is not None:
+        cache = agent.response_cache
+        # Cached answers built from re-ingested documents, or all of them once documents are
+        # added, are dropped on the worker's loop
+        client.on_invalidate = lambda doc_ids: loop.call_soon_threadsafe(
+            cache.clear if doc_ids is None else functools.partial(cache.invalidate_documents, doc_ids))
+    agent.preload()
+    WorkerHTTPServer(sock, worker_id, agent, client, loop).serve_forever()
+
+
+def serve(host: str, port: int, workers: int, threads: int = 0):
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    Config.ONNX_INTRA_OP_THREADS = Config.ONNX_INTRA_OP_THREADS or threads
+    if workers > 1 and Config.INFERENCE_BACKEND == "torch" and ModelRegistry.device() == "cuda":
+        raise SystemExit("CUDA state cannot be shared with forked workers; run with --workers 1")
+
+    # Load (but do not run) the models before forking so every child shares the same pages
+    ModelRegistry.get("embedding")
+    ModelRegistry.get("qa")
+    if Config.CHUNK_MODE == "tokens":
+        ModelRegistry.get("chunk_tokenizer")
+    logger.info(f"Model load times: {ModelRegistry.startup_report()}")
+
+    sock = socket.create_server((host, port), backlog=1024)
+    # Non-blocking, so a worker that loses the race for a connection goes back to waiting
+    sock.setblocking(False)
+    authkey = os.urandom(32)
+    listener = Listener(family="AF_UNIX" if hasattr(socket, "AF_UNIX") else "AF_INET", authkey=authkey)
+
+    # Objects that exist now are never collected, so the GC does not touch (and copy) their pages
+    gc.freeze()
+
+    children = {}
+
+    def spawn(role):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+                if role == "writer":
+                    run_writer(listener)
+                else:
+                    run_worker(role, sock, listener.address, authkey, threads)
+            except SystemExit:
+                pass
+            except BaseException:
+                logger.exception(f"Process {role} failed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (role, time.monotonic())
+
+    spawn("writer")
+    for worker_id in range(workers):
+        spawn(worker_id)
+    print(f"Serving on http://{host}:{sock.getsockname()[1]} with {workers} workers "
+          f"({threads} threads each)", flush=True)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        while children:
+            pid, status = os.wait()
+            if pid not in children:
+                continue
+            role, started = children.pop(pid)
+            if role == "writer":
+                logger.error(f"Store writer exited with status {status}, shutting down")
+                break
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                logger.error(f"Worker {role} exited with status {status} during startup, shutting down")
+                break
+            logger.warning(f"Worker {role} exited with status {status}, restarting")
+            spawn(role)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        # Workers first, so the writer flushes after the last update has arrived
+        for pids in ([p for p, (r, _) in children.items() if r != "writer"],
+                     [p for p, (r, _) in children.items() if r == "writer"]):
+            for pid in pids:
+                os.kill(pid, signal.SIGTERM)
+            for pid in pids:
+                os.waitpid(pid, 0)
+        sock.close()
+        listener.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=Config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=Config.SERVER_WORKERS)
+    parser.add_argument("--threads", type=int, default=Config.SERVER_THREADS_PER_WORKER,
+                        help="Intra-op threads per worker, 0 splits the CPUs evenly")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.threads)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.executor import ExecutorOverloaded
+from ai_tutor_bot.utils.metrics import metrics
+from ai_tutor_bot.utils.model_registry import ModelRegistry
+from agents.tutor_agent import TutorAgent
+from benchmarks.workload import install_stub_models
+
+DOCUMENTS = [
+    {"id": "physics_mechanics", "source": "Classical Mechanics",
+     "text": "Newton's second law states that force equals mass times acceleration. "
+             "Momentum is conserved when no external force acts on a system."},
+    {"id": "bio_cell", "source": "Cell Biology",
+     "text": "Mitochondria produce ATP through cellular respiration. "
+             "The cell membrane controls what enters and leaves the cell."},
+    {"id": "chem_basics", "source": "Chemistry Fundamentals",
+     "text": "Covalent bonds share electrons between atoms. "
+             "Ionic bonds form when electrons transfer from one atom to another."},
+]
+
+QUESTIONS = [
+    "What does Newton's second law state?",
+    "When is momentum conserved?",
+    "What do mitochondria produce?",
+    "What does the cell membrane control?",
+    "What do covalent bonds share?",
+    "How do ionic bonds form?",
+]
+
+
+def isolate(monkeypatch, tmp_path):
+    """Scratch storage, stub models and an executor with a one-caller queue"""
+    for name, value in {
+        "VECTOR_BACKEND": "numpy",
+        "NUMPY_INDEX_PATH": str(tmp_path / "numpy_index"),
+        "TEXT_STORE_PATH": str(tmp_path / "chunk_text.db"),
+        "CONCEPT_INDEX_PATH": str(tmp_path / "concept_index.json"),
+        "BM25_INDEX_PATH": str(tmp_path / "bm25_index.pkl"),
+        "PROGRESS_DB_PATH": str(tmp_path / "learning_progress.db"),
+        "EMBEDDING_CACHE_DIR": str(tmp_path / "embedding_cache"),
+        "DEVICE": "cpu",
+        "CHUNK_MODE": "words",
+        "EXECUTOR_MAX_WORKERS": 1,
+        "EXECUTOR_MAX_IN_FLIGHT": 1,
+        "EXECUTOR_MAX_QUEUE": 1,
+        "ANSWER_BATCH_OVERLOAD_WAIT": 0.01,
+    }.items():
+        monkeypatch.setattr(Config, name, value)
+    monkeypatch.setattr(ModelRegistry, "_models", {})
+    monkeypatch.setattr(ModelRegistry, "_load_times", {})
+    install_stub_models()
+
+
+def overload_waits() -> int:
+    return metrics.snapshot()["counters"].get("batch_overload_waits_total", 0)
+
+
+def bulk_calls(agent: TutorAgent) -> int:
+    return sum(stage["count"] for name, stage in agent.executor.stats()["stages"].items() if name != "live")
+
+
+async def live_traffic(agent: TutorAgent, stop: asyncio.Event):
+    """Keep one live call running and one queued until a bulk call is turned away, then let the
+    retry through and fill the queue again, so bulk executor calls keep meeting a full queue"""
+    while not stop.is_set():
+        release = threading.Event()
+        held = [asyncio.ensure_future(agent.executor.run("live", release.wait, timeout=0)) for _ in range(2)]
+        await asyncio.sleep(0)
+        if any(call.done() for call in held):
+            # A bulk call took the queue slot first; let it run and fill the queue after it
+            release.set()
+            await asyncio.gather(*held, return_exceptions=True)
+            continue
+        waits = overload_waits()
+        while overload_waits() == waits and not stop.is_set():
+            await asyncio.sleep(0.001)
+        calls = bulk_calls(agent)
+        release.set()
+        await asyncio.gather(*held)
+        while bulk_calls(agent) == calls and not stop.is_set():
+            await asyncio.sleep(0.001)
+
+
+async def answer_all(agent: TutorAgent):
+    stop = asyncio.Event()
+    live = asyncio.ensure_future(live_traffic(agent, stop))
+    await asyncio.sleep(0.001)
+    try:
+        return [response async for response in agent.answer_batch(("student", q) for q in QUESTIONS)]
+    finally:
+        stop.set()
+        await live
+
+
+def test_answer_batch_waits_out_a_full_executor_queue(monkeypatch, tmp_path):
+    isolate(monkeypatch, tmp_path)
+    metrics.reset()
+
+    async def scenario():
+        agent = TutorAgent()
+        # Warmup fans out one call per model, more than a one-caller queue admits
+        agent.preload()
+        await agent.ingest_documents(DOCUMENTS)
+        # The second run is answered from the response cache, so both the retrieval path and
+        # the cache-hit path see a full queue
+        return await answer_all(agent), await answer_all(agent)
+
+    try:
+        first, second = asyncio.run(scenario())
+    except ExecutorOverloaded as e:
+        raise AssertionError(f"answer_batch gave up on a busy executor: {e}")
+
+    for responses in (first, second):
+        assert sorted(response["index"] for response in responses) == list(range(len(QUESTIONS)))
+        assert all(response["context"] and response["sources"] for response in responses)
+    assert not any(response["cache_hit"] for response in first)
+    assert all(response["cache_hit"] for response in second)
+    assert overload_waits() > 0
@@ -0,0 +1,132 @@
+import re
+import random
+import asyncio
+from typing import List
+
+import pytest
+
+from ai_tutor_bot.utils.config import Config
+from ai_tutor_bot.utils.text_processor import TextProcessor
+from ai_tutor_bot.utils.ingestion import StreamingIngestor
+from agents.tutor_agent import TutorAgent
+
+
+def baseline_chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """Frozen copy of the original chunk_text, the reference the packer must keep matching"""
+    if not text or not isinstance(text, str):
+        return []
+
+    sentence_endings = r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|!)\s'
+    sentences = re.split(f'({sentence_endings}|\\n\\n)', text)
+    sentences = [s.strip() for s in sentences if s.strip()]
+
+    chunks = []
+    current_chunk = []
+    current_length = 0
+
+    for sentence in sentences:
+        words = sentence.split()
+        sentence_length = len(words)
+
+        if current_length + sentence_length <= chunk_size or not current_chunk:
+            current_chunk.append(sentence)
+            current_length += sentence_length
+        else:
+            chunks.append(" ".join(current_chunk))
+            overlap = []
+            overlap_length = 0
+            while current_chunk and overlap_length < chunk_overlap:
+                popped = current_chunk.pop(0)
+                popped_words = popped.split()
+                overlap.append(popped)
+                overlap_length += len(popped_words)
+            current_chunk = overlap + [sentence]
+            current_length = overlap_length + sentence_length
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+
+    return chunks
+
+
+WORDS = ["force", "mass", "energy", "cell", "atom", "E = mc^2", "3.14", "x", "Dr.", "e.g.",
+         "U.S.", "Newton's", "velocity", "ATP", "(see above)", "a", "the", "of"]
+ENDINGS = [". ", "? ", "! ", ".\n\n", "\n\n", " ", ".  ", "...", ". \n"]
+
+
+def random_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 40)):
+        parts.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 25))))
+        parts.append(rng.choice(ENDINGS))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(1, 0), (5, 2), (20, 5), (50, 10), (100, 100), (500, 50)])
+def test_chunk_text_matches_baseline(chunk_size, chunk_overlap):
+    rng = random.Random(chunk_size * 1000 + chunk_overlap)
+    for _ in range(500):
+        text = random_text(rng)
+        assert TextProcessor.chunk_text(text, chunk_size, chunk_overlap) == \
+            baseline_chunk_text(text, chunk_size, chunk_overlap), text
+
+
+@pytest.mark.parametrize("text", ["", None, 42, "   ", "One sentence without an ending"])
+def test_chunk_text_edge_inputs_match_baseline(text):
+    assert TextProcessor.chunk_text(text, 10, 2) == baseline_chunk_text(text, 10, 2)
+
+
+def test_pack_sentences_matches_baseline_packing():
+    rng = random.Random(7)
+    for _ in range(500):
+        text = random_text(rng)
+        sentences = TextProcessor.split_sentences(text)
+        lengths = [len(s.split()) for s in sentences]
+        chunk_size, chunk_overlap = rng.randint(1, 60), rng.randint(0, 30)
+        assert TextProcessor.pack_sentences(sentences, lengths, chunk_size, chunk_overlap) == \
+            baseline_chunk_text(text, chunk_size, chunk_overlap)
+
+
+def test_strict_packing_never_exceeds_chunk_size():
+    rng = random.Random(11)
+    for _ in range(300):
+        sentences = TextProcessor.split_sentences(random_text(rng))
+        lengths = [len(s.split()) for s in sentences]
+        chunk_size = max(lengths, default=1) + rng.randint(0, 30)
+        chunks = TextProcessor.pack_sentences(sentences, lengths, chunk_size, rng.randint(0, 20), strict=True)
+        assert all(len(chunk.split()) <= chunk_size for chunk in chunks)
+
+
+class _PreprocessAgent:
+    """Just enough of TutorAgent for StreamingIngestor._preprocess"""
+
+    def __init__(self):
+        from ai_tutor_bot.utils.executor import InferenceExecutor
+        self.executor = InferenceExecutor()
+        self.chunk_document = TutorAgent.chunk_document
+
+
+def test_process_pool_preprocessing_matches_in_process(monkeypatch):
+    monkeypatch.setattr(Config, "CHUNK_MODE", "words")
+    monkeypatch.setattr(Config, "PREPROCESS_TASK_SIZE", 3)
+    rng = random.Random(3)
+    changed = [({"id": f"doc-{i}", "source": "notes", "text": random_text(rng)}, f"hash-{i}") for i in range(20)]
+
+    async def preprocess(workers: int):
+        agent = _PreprocessAgent()
+        ingestor = StreamingIngestor(agent, preprocess_workers=workers)
+        try:
+            if workers > 1:
+                from ai_tutor_bot.utils.executor import InferenceExecutor
+                ingestor._preprocess_pool = InferenceExecutor(max_workers=workers, max_in_flight=workers * 2,
+                                                              kind="process")
+            return await ingestor._preprocess(changed)
+        finally:
+            if ingestor._preprocess_pool is not None:
+                ingestor._preprocess_pool.shutdown()
+            agent.executor.shutdown()
+
+    in_process = asyncio.run(preprocess(0))
+    pooled = asyncio.run(preprocess(2))
+    assert in_process
+    assert pooled == in_process